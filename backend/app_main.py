@@ -1,17 +1,30 @@
 import uvicorn
 import os
-import shutil
 import sys
 import io 
 import uuid 
 from pathlib import Path 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+import anyio.to_thread
 import redis 
-import json 
+import orjson
+import hashlib
+import secrets
+import shutil
+import socket
 import subprocess 
 import tempfile 
+import urllib.parse
+import threading
+import time
+import sqlite3
+import wave
+import struct
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 
 SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'src'))
@@ -19,21 +32,52 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 try:
-    from script_generator import generate_podcast_script
-    from runpod_orchestrator import submit_tts_job, get_tts_job_result, RUNPOD_API_KEY, RUNPOD_ENDPOINT_ID
+    from script_generator import generate_podcast_script, INLINE_PDF_MAX_BYTES, MODEL_NAME, PROMPT_VERSION
+    from runpod_orchestrator import (
+        submit_tts_job, submit_tts_batch_job, poll_tts_job, run_tts_job_sync,
+        decode_tts_output, decode_tts_batch_output, RUNPOD_API_KEY, RUNPOD_ENDPOINT_ID
+    )
 except ImportError as e:
     print(f"Error importing from src: {e}")
     print(f"Ensure src directory and runpod_orchestrator.py exist.")
     generate_podcast_script = None
+    INLINE_PDF_MAX_BYTES = 0
+    MODEL_NAME = None
+    PROMPT_VERSION = None
     submit_tts_job = None
-    get_tts_job_result = None
+    submit_tts_batch_job = None
+    poll_tts_job = None
+    run_tts_job_sync = None
+    decode_tts_output = None
+    decode_tts_batch_output = None
     RUNPOD_API_KEY = None
     RUNPOD_ENDPOINT_ID = None
 
 TEMP_UPLOAD_DIR = "temp_uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE_BYTES = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "50")) * 1024 * 1024
+PDF_MAGIC = b"%PDF-"
+TEMP_UPLOAD_MAX_AGE_S = int(os.environ.get("TEMP_UPLOAD_MAX_AGE_HOURS", "6")) * 3600
+TEMP_UPLOAD_SWEEP_INTERVAL_S = 600
 FINAL_AUDIO_DIR = "final_audio"
+# When set (e.g. "/internal_audio/"), downloads are handed to the reverse proxy with X-Accel-Redirect,
+# which must map that internal location to FINAL_AUDIO_DIR and send the file itself.
+INTERNAL_AUDIO_PREFIX = os.environ.get("INTERNAL_AUDIO_PREFIX", "")
+# Per-job copies of every TTS segment, for debugging only.
+SAVE_DEBUG_SEGMENTS = os.environ.get("SAVE_DEBUG_SEGMENTS") == "1"
+DEBUG_SEGMENTS_MAX_AGE_S = 86400
+TTS_CACHE_DIR = "tts_cache"
+TTS_CACHE_MAX_FILES = int(os.environ.get("TTS_CACHE_MAX_FILES", "2000"))
+# Optional second TTS cache tier in Redis, shared by every host and worker; 0 (the default) disables it.
+# Segments are a few hundred KB each, so only enable it on a Redis sized for that (or with volatile-lru).
+TTS_REDIS_CACHE_PREFIX = "tts:"
+TTS_REDIS_CACHE_TTL = int(os.environ.get("TTS_REDIS_CACHE_TTL_S", "0"))
 INTRO_AUDIO_PATH = os.path.join(os.path.dirname(__file__), "reference", "podcast_intro.wav") 
 SILENT_AUDIO_PATH = os.path.join(os.path.dirname(__file__), "reference", "silent_voice.wav")
+# Written before the segments of every podcast: the intro, then a short silent lead-in.
+LEADING_AUDIO_PATHS = (INTRO_AUDIO_PATH, SILENT_AUDIO_PATH)
+# (nchannels, sampwidth, framerate) of XTTS-v2 output; the leading audio is pre-converted to it at startup.
+TTS_AUDIO_FORMAT = (1, 2, 24000)
 
 
 if not RUNPOD_API_KEY:
@@ -42,29 +86,163 @@ if not RUNPOD_ENDPOINT_ID:
     print("Warning: RUNPOD_ENDPOINT_ID environment variable not set or defaulted. Using default.")
 
 
-SPEAKER_MAP = {
-    "A": "philip.wav", 
-    "B": "oskar.wav",  
-}
+# Speaker reference WAVs indexed by speaker ID, and the script's speaker codes mapped to those IDs.
+SPEAKER_LUT: tuple[str, ...] = ("philip.wav", "oskar.wav")
+SPEAKER_CODE_TO_ID = {"A": 0, "B": 1}
+
+# Max number of Runpod TTS requests in flight, shared by all podcast jobs in this process.
+TTS_MAX_CONCURRENCY = int(os.environ.get("TTS_MAX_CONCURRENCY", "16"))
+# Threads for sync endpoints and upload copies (anyio's default is 40). Each /job-events client
+# holds one for up to JOB_EVENTS_KEEPALIVE_S at a time, so the default is easily used up.
+API_THREAD_LIMIT = int(os.environ.get("API_THREAD_LIMIT", "128"))
 
 REDIS_URL = os.environ.get("REDIS_URL")
+# Every API thread (a /job-events subscription, a webhook BLPOP) and every TTS thread may hold a
+# connection at once, plus headroom for the job threads. When the pool is used up anyway, callers
+# wait up to REDIS_POOL_TIMEOUT_S for a free connection instead of failing at once.
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", str(API_THREAD_LIMIT + TTS_MAX_CONCURRENCY + 32)))
+REDIS_POOL_TIMEOUT_S = 10
+# Probe idle connections so load balancers don't silently drop them between job updates.
+REDIS_KEEPALIVE_OPTIONS = {
+    option: value
+    for option, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3))
+    if hasattr(socket, option)
+}
 redis_client = None
+redis_binary_client = None
 if REDIS_URL:
     try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True) 
+        redis_pool = redis.BlockingConnectionPool.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT_S,
+            socket_keepalive=True,
+            socket_keepalive_options={getattr(socket, option): value for option, value in REDIS_KEEPALIVE_OPTIONS.items()},
+            health_check_interval=30,
+            retry_on_timeout=True
+        )
+        redis_client = redis.Redis(connection_pool=redis_pool)
         redis_client.ping()  
+        if TTS_REDIS_CACHE_TTL:
+            # Audio is binary, so it needs connections that don't decode responses.
+            redis_binary_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+                REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT_S,
+                health_check_interval=30, retry_on_timeout=True
+            ))
         print("Successfully connected to Redis.")
     except redis.exceptions.ConnectionError as e:
-        print(f"Error connecting to Redis: {e}. Job status will not persist.")
+        print(f"Error connecting to Redis: {e}. Falling back to local SQLite job status store.")
         redis_client = None 
+        redis_binary_client = None
 else:
-    print("Warning: REDIS_URL environment variable not set. Job status will not persist across workers or restarts.")
+    print("Warning: REDIS_URL environment variable not set. Falling back to local SQLite job status store (single host only).")
 
 JOB_STATUS_TTL = 86400 
+# Minimum spacing between per-segment progress writes; phase changes are always written.
+STATUS_WRITE_INTERVAL_S = float(os.environ.get("STATUS_WRITE_INTERVAL_S", "0.5"))
+# Job status lives in a Redis hash per job; every change (only the changed fields) is also published on the same name.
+JOB_KEY_PREFIX = "job:"
+JOB_EVENTS_KEEPALIVE_S = 15
+# Finished podcasts keyed by the SHA-256 of their PDF, so a re-upload is served without regenerating.
+PODCAST_CACHE_PREFIX = "podcast:"
+PODCAST_CACHE_TTL = 7 * 86400
+# Generated scripts keyed by PDF digest, model and prompt version, so a retried or re-run job skips Gemini.
+SCRIPT_CACHE_PREFIX = "script:"
+SCRIPT_CACHE_TTL = 7 * 86400
+PODCAST_LOCK_PREFIX = "podcast-lock:"
+# Kept short and refreshed by the owning job (see _refresh_podcast_lock), so the lock lapses soon after
+# the owner's process dies instead of holding jobs for the same PDF waiting.
+PODCAST_LOCK_TTL = 60
+
+# Fallback job status store for single-host deployments without Redis.
+JOB_STATUS_DB_PATH = os.environ.get("JOB_STATUS_DB_PATH", "job_status.sqlite3")
+# Expired rows are deleted by set_job_status, on its first write and then at most once per this interval.
+JOB_STATUS_PRUNE_INTERVAL_S = 3600
+sqlite_conn = None
+sqlite_lock = threading.Lock()
+_last_job_status_prune = 0.0
+if redis_client is None:
+    try:
+        sqlite_conn = sqlite3.connect(JOB_STATUS_DB_PATH, check_same_thread=False, isolation_level=None)
+        sqlite_conn.execute("PRAGMA journal_mode=WAL")
+        sqlite_conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_status (job_id TEXT PRIMARY KEY, status_json TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        sqlite_conn.execute("CREATE INDEX IF NOT EXISTS job_status_expires_at ON job_status (expires_at)")
+        print(f"Using SQLite job status store at: {JOB_STATUS_DB_PATH}")
+    except sqlite3.Error as e:
+        print(f"Error opening SQLite job status store: {e}. Job status will not persist.")
+        sqlite_conn = None
+
+TTS_EXECUTOR = ThreadPoolExecutor(max_workers=TTS_MAX_CONCURRENCY, thread_name_prefix="tts")
+# Taken by a job's own thread before it hands a segment to TTS_EXECUTOR and released when the segment
+# is done, so concurrent jobs interleave their segments instead of queueing behind each other.
+RUNPOD_SLOTS = threading.BoundedSemaphore(TTS_MAX_CONCURRENCY)
+# How often a job with segments in flight looks for slots freed by other jobs.
+RUNPOD_SLOT_RECHECK_S = 1.0
+# Script lines sent per Runpod job. Batches share one queue wait but take one slot, so large batches
+# trade parallelism for fewer jobs. Values above 1 need a worker that accepts "items".
+TTS_BATCH_SIZE = max(1, int(os.environ.get("TTS_BATCH_SIZE", "1")))
+# Segments being synthesized right now, by TTS cache key. An identical segment (a repeated line, or the
+# same line in a concurrent job) waits for that result instead of starting another Runpod job.
+_inflight_tts: dict[str, Future] = {}
+_inflight_tts_lock = threading.Lock()
+
+# Public URL of this server. When set, Runpod reports finished TTS jobs to /runpod-webhook/
+# instead of being polled; polling remains the fallback if no callback arrives in time.
+PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", "").rstrip("/")
+WEBHOOK_WAIT_S = int(os.environ.get("RUNPOD_WEBHOOK_WAIT_S", "120"))
+if PUBLIC_BASE_URL and not redis_client and int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+    # Without Redis a callback is only seen by the worker process it reaches, which is often not the waiting one.
+    print("Warning: PUBLIC_BASE_URL needs REDIS_URL when running several worker processes. Polling Runpod instead of using webhooks.")
+    PUBLIC_BASE_URL = ""
+# Without webhooks, segments up to this many characters go through Runpod's /runsync in a single
+# request instead of being submitted and polled; 0 always polls.
+RUNSYNC_MAX_CHARS = int(os.environ.get("RUNSYNC_MAX_CHARS", "400"))
+# Runpod may deliver a webhook to any worker process, so all workers share one token. With Redis,
+# payloads are pushed onto a per-TTS-job list that the waiting thread BLPOPs, whichever worker it is in;
+# the list also holds a callback that arrives before the waiter starts.
+WEBHOOK_TOKEN_KEY = "runpod-webhook-token"
+WEBHOOK_RESULT_PREFIX = "tts_done:"
+WEBHOOK_RESULT_TTL = 600
+_webhook_token = os.environ.get("RUNPOD_WEBHOOK_TOKEN") or secrets.token_urlsafe(16)
+if redis_client and not os.environ.get("RUNPOD_WEBHOOK_TOKEN"):
+    try:
+        redis_client.set(WEBHOOK_TOKEN_KEY, _webhook_token, nx=True)
+        _webhook_token = redis_client.get(WEBHOOK_TOKEN_KEY) or _webhook_token
+    except redis.exceptions.RedisError as e:
+        print(f"Redis Error - Failed to share webhook token: {e}")
+_webhook_events: dict[str, threading.Event] = {}
+# Without Redis: payloads by TTS job ID with the monotonic time they arrived; ones nobody collects
+# within WEBHOOK_RESULT_TTL (the waiter timed out, or an unknown ID) are dropped on the next delivery.
+_webhook_payloads: dict[str, tuple[float, dict]] = {}
+_webhook_lock = threading.Lock()
+
+# Upper bound on the Gemini script generation call; 0 disables the limit.
+SCRIPT_GENERATION_TIMEOUT_S = float(os.environ.get("SCRIPT_GENERATION_TIMEOUT_S", "300"))
+
+MAX_BATCH_FILES = int(os.environ.get("MAX_BATCH_FILES", "10"))
+
+# Podcast jobs accepted but not yet finished in this process.
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "4"))
+active_job_count = 0
+active_job_lock = threading.Lock()
+# Jobs run on their own threads rather than as BackgroundTasks, so a long job never
+# occupies Starlette's threadpool that also serves the sync status and download endpoints.
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="podcast-job")
+# With JOB_QUEUE=redis the API only saves uploads and pushes jobs onto this Redis list; they are run
+# by job_worker.py processes on the same host (they read the saved PDF from TEMP_UPLOAD_DIR).
+PODCAST_QUEUE_KEY = "pdfqueue"
+USE_JOB_QUEUE = os.environ.get("JOB_QUEUE") == "redis" and redis_client is not None
 
 
 app = FastAPI()
 
+@app.on_event("startup")
+async def raise_api_thread_limit():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREAD_LIMIT
+
 origins = [
     "https://www.tts-ut.ee",
     "http://localhost",
@@ -83,122 +261,433 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-if not os.path.exists(TEMP_UPLOAD_DIR):
-    os.makedirs(TEMP_UPLOAD_DIR)
-if not os.path.exists(FINAL_AUDIO_DIR):
-    os.makedirs(FINAL_AUDIO_DIR)
+for directory in (TEMP_UPLOAD_DIR, FINAL_AUDIO_DIR, TTS_CACHE_DIR):
+    os.makedirs(directory, exist_ok=True)
 
-def combine_audio_segments(
-    audio_bytes_list: list[bytes | None],
-    output_path: str,
-    intro_audio_path: str | None = None
-) -> bool:
-    """Combines a list of WAV audio bytes using the ffmpeg concat filter for robustness."""
-    
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        return False
+_last_upload_sweep = float("-inf")
+_upload_sweep_lock = threading.Lock()
 
-    temp_file_paths = []  
-    input_files_for_ffmpeg = []  
+def prune_stale_uploads():
+    """Removes uploads in TEMP_UPLOAD_DIR older than TEMP_UPLOAD_MAX_AGE_S, at most once per TEMP_UPLOAD_SWEEP_INTERVAL_S."""
+    global _last_upload_sweep
+    with _upload_sweep_lock:
+        if time.monotonic() - _last_upload_sweep < TEMP_UPLOAD_SWEEP_INTERVAL_S:
+            return
+        _last_upload_sweep = time.monotonic()
+    cutoff = time.time() - TEMP_UPLOAD_MAX_AGE_S
+    with os.scandir(TEMP_UPLOAD_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
 
-   
-    if intro_audio_path:
-        abs_intro_path = os.path.abspath(intro_audio_path)
-        if os.path.exists(abs_intro_path):
-            input_files_for_ffmpeg.append(abs_intro_path)
+# Uploads left behind by jobs that died (with this or an earlier process, or lost from the job queue)
+# are never picked up again; swept on startup and then as new jobs arrive.
+prune_stale_uploads()
 
-    valid_segment_count = 0
-    for i, audio_bytes in enumerate(audio_bytes_list):
-        if audio_bytes:
+# Decoded static reference WAVs (intro, silence) keyed by path: (frames, nchannels, sampwidth, framerate).
+# Missing or unreadable files are cached as None so they are not stat'ed again on every job.
+_reference_audio_cache: dict[str, tuple[bytes, int, int, int] | None] = {}
+# The same references converted to another (nchannels, sampwidth, framerate), keyed by (path, format).
+_normalized_reference_cache: dict[tuple[str, tuple[int, int, int]], tuple[bytes, int, int, int] | None] = {}
+_reference_audio_lock = threading.Lock()
+
+def _read_wav_frames(source) -> tuple[bytes, int, int, int]:
+    """Reads a WAV file path or file-like object into (frames, nchannels, sampwidth, framerate)."""
+    with wave.open(source, "rb") as reader:
+        return reader.readframes(reader.getnframes()), reader.getnchannels(), reader.getsampwidth(), reader.getframerate()
+
+def _parse_wav_bytes(audio_bytes: bytes) -> tuple[memoryview, int, int, int]:
+    """Locates the PCM data in an in-memory WAV without copying it.
+
+    Returns (frames, nchannels, sampwidth, framerate) where frames is a view into audio_bytes.
+    """
+    view = memoryview(audio_bytes)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise wave.Error("not a RIFF/WAVE file")
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", view, offset + 4)[0]
+        body_start = offset + 8
+        if chunk_id == b"fmt ":
+            format_tag, nchannels, framerate, _, block_align, bits = struct.unpack_from("<HHIIHH", view, body_start)
+            if format_tag != 1:
+                raise wave.Error(f"unsupported WAV format tag: {format_tag}")
+            sampwidth = (bits + 7) // 8
+            # Checked here so a malformed header falls back to ffmpeg like any other bad WAV.
+            if nchannels < 1 or not 1 <= sampwidth <= 4 or framerate < 1 or block_align != nchannels * sampwidth:
+                raise wave.Error(f"invalid fmt chunk: {nchannels} channels, {bits} bits, {framerate} Hz, block align {block_align}")
+            fmt = (nchannels, sampwidth, framerate, block_align)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise wave.Error("data chunk before fmt chunk")
+            nchannels, sampwidth, framerate, block_align = fmt
+            data_end = min(body_start + chunk_size, len(view))
+            data_end -= (data_end - body_start) % block_align
+            return view[body_start:data_end], nchannels, sampwidth, framerate
+        offset = body_start + chunk_size + (chunk_size & 1)
+    raise wave.Error("no data chunk found")
+
+def _load_reference_audio(audio_path: str) -> tuple[bytes, int, int, int] | None:
+    """Decodes a static reference WAV once and reuses it for every later job."""
+    abs_audio_path = os.path.abspath(audio_path)
+    with _reference_audio_lock:
+        if abs_audio_path not in _reference_audio_cache:
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_wav:
-                    temp_wav.write(audio_bytes)
-                    temp_file_path = temp_wav.name
-                temp_file_paths.append(temp_file_path)  
-                input_files_for_ffmpeg.append(temp_file_path)  
-                valid_segment_count += 1
-            except Exception:
-                continue  
-
-    if not input_files_for_ffmpeg:
+                _reference_audio_cache[abs_audio_path] = _read_wav_frames(abs_audio_path)
+            except FileNotFoundError:
+                _reference_audio_cache[abs_audio_path] = None
+            except (wave.Error, EOFError) as e:
+                print(f"Warning: Could not decode reference audio {abs_audio_path}: {e}")
+                _reference_audio_cache[abs_audio_path] = None
+        return _reference_audio_cache[abs_audio_path]
+
+def write_wav_frames(decoded_inputs: list[tuple[bytes, int, int, int]], output_path: str) -> bool:
+    """Writes decoded WAV frames to a single file. Returns False if the inputs differ in format."""
+    if not decoded_inputs:
+        return False
+    _, nchannels, sampwidth, framerate = decoded_inputs[0]
+    if any(decoded[1:] != (nchannels, sampwidth, framerate) for decoded in decoded_inputs):
         return False
 
-    # Construct ffmpeg command using concat filter
     abs_output_path = os.path.abspath(output_path)
     os.makedirs(os.path.dirname(abs_output_path), exist_ok=True)
+    with wave.open(abs_output_path, "wb") as out:
+        out.setnchannels(nchannels)
+        out.setsampwidth(sampwidth)
+        out.setframerate(framerate)
+        for frames, *_ in decoded_inputs:
+            out.writeframesraw(frames)
+    return True
 
-    ffmpeg_command = ["ffmpeg", "-y"]  
+PROBE_HEADER_BYTES = 64 * 1024
+# ffmpeg/ffprobe runs are CPU-bound, so they are capped at one per core across all jobs; the
+# I/O-bound Runpod requests have their own, much larger limit (RUNPOD_SLOTS).
+FFMPEG_SLOTS = threading.BoundedSemaphore(int(os.environ.get("FFMPEG_MAX_CONCURRENCY", os.cpu_count() or 1)))
+# Resolved once at import; format conversion is skipped entirely when the binaries are missing.
+FFMPEG_BIN = shutil.which("ffmpeg")
+FFPROBE_BIN = shutil.which("ffprobe")
 
-    for file_path in input_files_for_ffmpeg:
-        ffmpeg_command.extend(["-i", file_path])
+def _probe_audio_format(audio_bytes: bytes) -> tuple[str, str, int] | None:
+    """Returns (codec_name, sample_rate, channels) of the first audio stream in in-memory audio, or None."""
+    if FFPROBE_BIN is None:
+        return None
+    # Only the header is needed; ffprobe reads it from stdin so the bytes never touch disk.
+    with FFMPEG_SLOTS:
+        result = subprocess.run(
+            [FFPROBE_BIN, "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=codec_name,sample_rate,channels", "-of", "json", "-i", "pipe:0"],
+            input=audio_bytes[:PROBE_HEADER_BYTES], capture_output=True, check=False
+        )
+    if result.returncode != 0:
+        return None
+    try:
+        stream = orjson.loads(result.stdout)["streams"][0]
+        return stream["codec_name"], stream["sample_rate"], stream["channels"]
+    except (orjson.JSONDecodeError, KeyError, IndexError):
+        return None
 
-    filter_complex_str = ""
-    for i in range(len(input_files_for_ffmpeg)):
-        filter_complex_str += f"[{i}:a]" 
-    filter_complex_str += f"concat=n={len(input_files_for_ffmpeg)}:v=0:a=1[outa]"  # Concatenate audio streams
+_PCM_SAMPLE_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}
 
-    ffmpeg_command.extend(["-filter_complex", filter_complex_str])
-    ffmpeg_command.extend(["-map", "[outa]"]) 
+def _ffmpeg_to_pcm(audio_bytes: bytes, params: tuple[int, int, int], input_args: tuple[str, ...] = ()) -> bytes | None:
+    """Converts audio to raw PCM in params (nchannels, sampwidth, framerate) through ffmpeg pipes. None if that fails."""
+    nchannels, sampwidth, framerate = params
+    if FFMPEG_BIN is None or sampwidth not in _PCM_SAMPLE_FORMATS:
+        return None
+    command = [FFMPEG_BIN, "-v", "error", *input_args, "-i", "pipe:0",
+               "-f", _PCM_SAMPLE_FORMATS[sampwidth], "-ar", str(framerate), "-ac", str(nchannels), "pipe:1"]
+    with FFMPEG_SLOTS:
+        result = subprocess.run(command, input=audio_bytes, capture_output=True, check=False)
+    return result.stdout if result.returncode == 0 else None
 
-    ffmpeg_command.extend([
-        "-ar", "48000",  
-        "-ac", "2",      
-        "-acodec", "pcm_s16le",  
-        abs_output_path 
-    ])
+def _convert_decoded(decoded: tuple[bytes, int, int, int], params: tuple[int, int, int]) -> tuple[bytes, int, int, int] | None:
+    """Converts decoded PCM frames to another (nchannels, sampwidth, framerate). None if that fails."""
+    frames, nchannels, sampwidth, framerate = decoded
+    if decoded[1:] == params:
+        return decoded
+    if sampwidth not in _PCM_SAMPLE_FORMATS:
+        return None
+    raw_input_args = ("-f", _PCM_SAMPLE_FORMATS[sampwidth], "-ar", str(framerate), "-ac", str(nchannels))
+    converted = _ffmpeg_to_pcm(frames, params, raw_input_args)
+    return (converted, *params) if converted is not None else None
 
-    result = subprocess.run(ffmpeg_command, capture_output=True, text=True, check=False)
+def _load_normalized_reference_audio(audio_path: str, params: tuple[int, int, int]) -> tuple[bytes, int, int, int] | None:
+    """Returns a static reference WAV converted to params, converting it only the first time."""
+    decoded = _load_reference_audio(audio_path)
+    if decoded is None or decoded[1:] == params:
+        return decoded
+    cache_key = (os.path.abspath(audio_path), params)
+    with _reference_audio_lock:
+        if cache_key not in _normalized_reference_cache:
+            _normalized_reference_cache[cache_key] = _convert_decoded(decoded, params)
+        return _normalized_reference_cache[cache_key]
 
-    if result.returncode == 0:
-        return True
+def warm_reference_audio():
+    """Decodes the leading audio and converts it to the TTS output format before the first job needs it."""
+    for audio_path in LEADING_AUDIO_PATHS:
+        _load_normalized_reference_audio(audio_path, TTS_AUDIO_FORMAT)
+
+warm_reference_audio()
+
+class StreamingWavCombiner:
+    """Appends TTS segments to the output WAV in script order while results are still arriving.
+
+    Segments that finish early are held until every earlier segment is in. The first TTS segment
+    fixes the output format, so speech keeps its native rate and channel count; the leading audio
+    comes from the reference cache already in that format, and any later input in another format
+    (or not plain PCM) is converted with ffmpeg as it arrives, so conversion overlaps with the
+    remaining TTS work. If conversion is not possible, the combiner gives up and the caller
+    falls back to combine_audio_segments.
+    """
+
+    def __init__(self, output_path: str, total_segments: int, leading_audio_paths: tuple[str, ...] = ()):
+        self.output_path = os.path.abspath(output_path)
+        self.total_segments = total_segments
+        self.next_index = 0
+        self.pending = {}
+        self.writer = None
+        self.params = None
+        self.ok = True
+        # Written once the first segment arrives and has fixed the output format.
+        self.leading_audio_paths = leading_audio_paths
+
+    def _open(self, params: tuple[int, int, int]):
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        self.params = params
+        self.writer = wave.open(self.output_path, "wb")
+        self.writer.setnchannels(params[0])
+        self.writer.setsampwidth(params[1])
+        self.writer.setframerate(params[2])
+        for audio_path in self.leading_audio_paths:
+            if _load_reference_audio(audio_path) is None:
+                continue
+            decoded = _load_normalized_reference_audio(audio_path, params)
+            if decoded is None:
+                self.abort()
+                return
+            self.writer.writeframesraw(decoded[0])
+
+    def _write(self, decoded: tuple[bytes, int, int, int]):
+        if not self.ok:
+            return
+        if self.writer is None:
+            self._open(decoded[1:])
+            if not self.ok:
+                return
+        decoded = _convert_decoded(decoded, self.params)
+        if decoded is None:
+            self.abort()
+            return
+        self.writer.writeframesraw(decoded[0])
+
+    def add(self, index: int, audio_bytes: bytes | None) -> int:
+        """Registers segment `index` and flushes the ready prefix. Returns how many segments are written."""
+        self.pending[index] = audio_bytes
+        while self.next_index in self.pending:
+            audio_bytes = self.pending.pop(self.next_index)
+            if audio_bytes and self.ok:
+                try:
+                    decoded = _parse_wav_bytes(audio_bytes)
+                except (wave.Error, struct.error):
+                    converted = _ffmpeg_to_pcm(audio_bytes, self.params) if self.params else None
+                    decoded = (converted, *self.params) if converted is not None else None
+                if decoded is None:
+                    self.abort()
+                else:
+                    self._write(decoded)
+            self.next_index += 1
+        return self.next_index
+
+    def abort(self):
+        """Stops streaming and removes the partial output."""
+        self.ok = False
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        try:
+            os.remove(self.output_path)
+        except FileNotFoundError:
+            pass
+
+    def finish(self) -> bool:
+        """Finalizes the WAV header. Returns False if the caller must fall back to a full combine."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        return self.ok and self.params is not None and self.next_index == self.total_segments
+
+def combine_audio_segments(
+    audio_bytes_list: list[bytes | None],
+    output_path: str,
+    leading_audio_paths: tuple[str, ...] = ()
+) -> bool:
+    """Combines a list of WAV audio bytes (after optional leading reference audio) into one WAV file.
+
+    The output uses the most common segment format. The leading audio (converted once and cached)
+    and any odd segments are converted to it; segments that are not plain PCM are decoded by piping
+    them through ffmpeg one at a time, so nothing is written to temporary files.
+    """
+    segments = [audio_bytes for audio_bytes in audio_bytes_list if audio_bytes]
+    decoded_segments = []
+    for audio_bytes in segments:
+        try:
+            decoded_segments.append(_parse_wav_bytes(audio_bytes))
+        except (wave.Error, struct.error):
+            decoded_segments.append(None)
+
+    pcm_formats = [decoded[1:] for decoded in decoded_segments if decoded]
+    if pcm_formats:
+        params = Counter(pcm_formats).most_common(1)[0][0]
     else:
-        if os.path.exists(abs_output_path):
-            try: os.remove(abs_output_path)
-            except OSError: pass
+        probed = _probe_audio_format(segments[0]) if segments else None
+        if probed is None:
+            return False
+        _, sample_rate, channels = probed
+        params = (int(channels), 2, int(sample_rate))
+
+    decoded_inputs = []
+    for audio_path in leading_audio_paths:
+        if _load_reference_audio(audio_path):
+            decoded_inputs.append(_load_normalized_reference_audio(audio_path, params))
+    for audio_bytes, decoded in zip(segments, decoded_segments):
+        if decoded is None:
+            pcm = _ffmpeg_to_pcm(audio_bytes, params)
+            decoded_inputs.append((pcm, *params) if pcm is not None else None)
+        else:
+            decoded_inputs.append(_convert_decoded(decoded, params))
+
+    if None in decoded_inputs:
         return False
+    return write_wav_frames(decoded_inputs, output_path)
 
-    for temp_path in temp_file_paths:
-        if os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
+def job_store_available() -> bool:
+    """True if either Redis or the SQLite fallback can hold job status."""
+    return redis_client is not None or sqlite_conn is not None
+
+def set_job_status(job_id: str, status_data: dict, changed_fields: set[str] | None = None):
+    """Stores job status data in a Redis hash and publishes it, or writes it to the SQLite fallback store.
 
-def set_job_status(job_id: str, status_data: dict):
-    """Stores job status data in Redis as JSON."""
+    With changed_fields, only those fields are written to and published on Redis; the others must already be stored.
+    """
+    global _last_job_status_prune
     if redis_client:
+        job_key = f"{JOB_KEY_PREFIX}{job_id}"
+        changes = status_data if changed_fields is None else {field: status_data[field] for field in changed_fields}
         try:
-            status_json = json.dumps(status_data)
-            redis_client.set(job_id, status_json, ex=JOB_STATUS_TTL)
-            print(f"[Job {job_id}] Redis SET successful. Status: {status_data.get('status')}, Msg: {status_data.get('message')}") 
+            # Hash values are JSON-encoded (with orjson; this runs on every progress tick) so None and numbers survive the round trip.
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hset(job_key, mapping={field: orjson.dumps(value) for field, value in changes.items()})
+            pipe.expire(job_key, JOB_STATUS_TTL)
+            pipe.publish(job_key, orjson.dumps(changes))
+            pipe.execute()
+            print(f"[Job {job_id}] Redis HSET successful. Status: {status_data.get('status')}, Msg: {status_data.get('message')}") 
         except redis.exceptions.RedisError as e:
             print(f"[Job {job_id}] Redis Error - Failed to set status: {e}")
+    elif sqlite_conn:
+        try:
+            with sqlite_lock:
+                sqlite_conn.execute(
+                    "INSERT OR REPLACE INTO job_status (job_id, status_json, expires_at) VALUES (?, ?, ?)",
+                    (job_id, orjson.dumps(status_data).decode(), time.time() + JOB_STATUS_TTL)
+                )
+                if time.monotonic() - _last_job_status_prune >= JOB_STATUS_PRUNE_INTERVAL_S:
+                    _last_job_status_prune = time.monotonic()
+                    sqlite_conn.execute("DELETE FROM job_status WHERE expires_at < ?", (time.time(),))
+        except sqlite3.Error as e:
+            print(f"[Job {job_id}] SQLite Error - Failed to set status: {e}")
     else:
-        print(f"[Job {job_id}] Warning: Redis client not available. Cannot save status.")
+        print(f"[Job {job_id}] Warning: No job status store available. Cannot save status.")
+
+class StatusWriter:
+    """Holds a job's status dict and writes progress updates at most once per STATUS_WRITE_INTERVAL_S."""
+
+    def __init__(self, job_id: str, status: dict, min_interval_s: float = STATUS_WRITE_INTERVAL_S):
+        self.job_id = job_id
+        self.status = status
+        self.min_interval_s = min_interval_s
+        self.last_flush = 0.0
+        self.changed_fields = set()
+
+    def update(self, **changes):
+        """Applies the changes and writes them if the interval has elapsed since the last write."""
+        self.status.update(changes)
+        self.changed_fields.update(changes)
+        if time.monotonic() - self.last_flush >= self.min_interval_s:
+            self.flush()
+
+    def flush(self):
+        """Writes any changes not yet stored."""
+        if self.changed_fields:
+            set_job_status(self.job_id, self.status, self.changed_fields)
+            self.last_flush = time.monotonic()
+            self.changed_fields = set()
 
 def get_job_status_from_redis(job_id: str) -> dict | None:
-    """Retrieves and decodes job status data from Redis."""
+    """Retrieves and decodes job status data from its Redis hash, or from the SQLite fallback store."""
     if redis_client:
         try:
-            status_json = redis_client.get(job_id)
-            if status_json:
-                print(f"[Job {job_id}] Redis GET successful. Found status.") 
-                return json.loads(status_json) 
+            status_fields = redis_client.hgetall(f"{JOB_KEY_PREFIX}{job_id}")
+            if status_fields:
+                print(f"[Job {job_id}] Redis HGETALL successful. Found status.") 
+                return {field: orjson.loads(value) for field, value in status_fields.items()}
             else:
-                print(f"[Job {job_id}] Redis GET - Key not found.") 
+                print(f"[Job {job_id}] Redis HGETALL - Key not found.") 
                 return None 
         except redis.exceptions.RedisError as e:
             print(f"[Job {job_id}] Redis Error - Failed to get status: {e}")
             return None 
-        except json.JSONDecodeError as e:
-             print(f"[Job {job_id}] Redis Error - Failed to decode status JSON: {e}. Data: {status_json}")
+        except orjson.JSONDecodeError as e:
+             print(f"[Job {job_id}] Redis Error - Failed to decode status field: {e}. Data: {status_fields}")
              return None 
+    elif sqlite_conn:
+        try:
+            with sqlite_lock:
+                row = sqlite_conn.execute(
+                    "SELECT status_json FROM job_status WHERE job_id = ? AND expires_at > ?",
+                    (job_id, time.time())
+                ).fetchone()
+            return orjson.loads(row[0]) if row else None
+        except (sqlite3.Error, orjson.JSONDecodeError) as e:
+            print(f"[Job {job_id}] SQLite Error - Failed to get status: {e}")
+            return None
     else:
-        print(f"Warning: Redis client not available. Cannot get job status.")
+        print(f"Warning: No job status store available. Cannot get job status.")
         return None
 
+def iter_job_statuses(job_id: str, idle_timeout_s: float = JOB_EVENTS_KEEPALIVE_S):
+    """Yields the job's current status, then each published update until it completes or fails.
+
+    Yields None whenever nothing arrived within idle_timeout_s. Requires Redis.
+    """
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    try:
+        # Subscribe before reading the current status so no update can fall in between.
+        pubsub.subscribe(f"{JOB_KEY_PREFIX}{job_id}")
+        status_info = get_job_status_from_redis(job_id)
+        if status_info:
+            yield status_info
+            if status_info["status"] in ("COMPLETED", "FAILED"):
+                return
+        status_info = status_info or {}
+        while True:
+            message = pubsub.get_message(timeout=idle_timeout_s)
+            if message is None:
+                yield None
+                continue
+            # Updates carry only the changed fields.
+            status_info = {**status_info, **orjson.loads(message["data"])}
+            yield status_info
+            if status_info.get("status") in ("COMPLETED", "FAILED"):
+                return
+    except redis.exceptions.RedisError as e:
+        print(f"[Job {job_id}] Redis Error - Job status subscription ended: {e}")
+    finally:
+        pubsub.close()
+
 def save_audio_segments(audio_bytes_list: list[bytes | None], debug_dir: str):
     """Saves each audio segment to a specified debug directory."""
     os.makedirs(debug_dir, exist_ok=True)  
@@ -213,91 +702,471 @@ def save_audio_segments(audio_bytes_list: list[bytes | None], debug_dir: str):
             except Exception as e:
                 print(f"Failed to save segment {i}: {e}")
 
-def process_podcast_job(job_id: str, temp_pdf_path: str, original_filename: str):
-    """The actual processing logic that runs in the background, using Redis for status."""
+def prune_debug_segments():
+    """Removes debug_segments_* directories in FINAL_AUDIO_DIR older than DEBUG_SEGMENTS_MAX_AGE_S."""
+    cutoff = time.time() - DEBUG_SEGMENTS_MAX_AGE_S
+    with os.scandir(FINAL_AUDIO_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.name.startswith("debug_segments_") and entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+
+# Also on startup, so directories from earlier debug runs expire even with the flag now off.
+prune_debug_segments()
+
+def speaker_filename_for(speaker_code: str | None) -> str | None:
+    """Returns the reference WAV for a script speaker code, or None if the code is unknown."""
+    speaker_id = SPEAKER_CODE_TO_ID.get(speaker_code)
+    return SPEAKER_LUT[speaker_id] if speaker_id is not None else None
+
+def tts_cache_key(segment: dict) -> str | None:
+    """Returns the content-addressed cache key for a segment, or None if it cannot be synthesized."""
+    text = segment.get("text")
+    speaker_filename = speaker_filename_for(segment.get("speaker"))
+    if not text or not speaker_filename:
+        return None
+    return hashlib.sha256(f"{speaker_filename}\0{text}".encode("utf-8")).hexdigest()
+
+def tts_cache_path(segment: dict) -> str | None:
+    """Returns the content-addressed cache path for a segment, or None if it cannot be synthesized."""
+    key = tts_cache_key(segment)
+    return os.path.join(TTS_CACHE_DIR, f"{key}.wav") if key else None
+
+def load_cached_tts(segment: dict) -> bytes | None:
+    """Returns previously synthesized audio for the segment, if cached on disk or in Redis."""
+    cache_path = tts_cache_path(segment)
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path, "rb") as cache_file:
+            audio_bytes = cache_file.read()
+    except FileNotFoundError:
+        audio_bytes = None
+    except OSError as e:
+        print(f"Warning: Could not read TTS cache entry {cache_path}: {e}")
+        return None
+    if audio_bytes is not None:
+        try:
+            os.utime(cache_path)  # Mark as recently used for LRU eviction.
+        except OSError:
+            pass  # Pruned by another job since the read; the bytes are still good.
+        return audio_bytes
+    if redis_binary_client is None:
+        return None
+    try:
+        return redis_binary_client.get(f"{TTS_REDIS_CACHE_PREFIX}{tts_cache_key(segment)}")
+    except redis.exceptions.RedisError as e:
+        print(f"Redis Error - Failed to read TTS cache: {e}")
+        return None
+
+def store_cached_tts(segment: dict, audio_bytes: bytes):
+    """Atomically writes synthesized audio for the segment to the TTS cache (and to Redis, if enabled)."""
+    cache_path = tts_cache_path(segment)
+    if not cache_path:
+        return
+    if redis_binary_client is not None:
+        try:
+            redis_binary_client.set(f"{TTS_REDIS_CACHE_PREFIX}{tts_cache_key(segment)}", audio_bytes, ex=TTS_REDIS_CACHE_TTL)
+        except redis.exceptions.RedisError as e:
+            print(f"Redis Error - Failed to write TTS cache: {e}")
+    temp_cache_path = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=TTS_CACHE_DIR, suffix=".tmp", delete=False) as temp_cache_file:
+            temp_cache_path = temp_cache_file.name
+            temp_cache_file.write(audio_bytes)
+        os.replace(temp_cache_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write TTS cache entry {cache_path}: {e}")
+        # A failed write or rename must not leave the temp file behind; prune_tts_cache only sees .wav entries.
+        if temp_cache_path:
+            try:
+                os.remove(temp_cache_path)
+            except OSError:
+                pass
+
+def prune_tts_cache():
+    """Evicts the least recently used TTS cache entries beyond TTS_CACHE_MAX_FILES."""
+    try:
+        entries = [entry for entry in os.scandir(TTS_CACHE_DIR) if entry.name.endswith(".wav")]
+    except OSError:
+        return
+    if len(entries) <= TTS_CACHE_MAX_FILES:
+        return
+    # Other jobs and processes prune the same directory, so entries may vanish before they are stat'ed.
+    aged_paths = []
+    for entry in entries:
+        try:
+            aged_paths.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            continue
+    aged_paths.sort()
+    for _, path in aged_paths[:len(aged_paths) - TTS_CACHE_MAX_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_cached_podcast(pdf_digest: str) -> str | None:
+    """Returns the path of a finished podcast for this PDF digest, if it is still on disk."""
+    if not redis_client:
+        return None
+    try:
+        entry = redis_client.get(f"{PODCAST_CACHE_PREFIX}{pdf_digest}")
+    except redis.exceptions.RedisError as e:
+        print(f"Redis Error - Failed to read podcast cache: {e}")
+        return None
+    if not entry:
+        return None
+    entry = orjson.loads(entry)
+    return entry["path"] if os.path.exists(entry["path"]) else None
+
+def store_cached_podcast(pdf_digest: str, result_path: str):
+    """Records the finished podcast for this PDF digest."""
+    if not redis_client:
+        return
+    try:
+        redis_client.set(f"{PODCAST_CACHE_PREFIX}{pdf_digest}", orjson.dumps({"path": result_path}), ex=PODCAST_CACHE_TTL)
+    except redis.exceptions.RedisError as e:
+        print(f"Failed to store podcast cache entry: {e}")
+
+def script_cache_key(pdf_digest: str) -> str:
+    """Returns the Redis key of the generated script for this PDF digest."""
+    return f"{SCRIPT_CACHE_PREFIX}{MODEL_NAME}:{PROMPT_VERSION}:{pdf_digest}"
+
+def get_cached_script(pdf_digest: str) -> list[dict[str, str]] | None:
+    """Returns the script generated earlier for this PDF digest, if cached."""
+    if not redis_client:
+        return None
+    try:
+        entry = redis_client.get(script_cache_key(pdf_digest))
+    except redis.exceptions.RedisError as e:
+        print(f"Redis Error - Failed to read script cache: {e}")
+        return None
+    return orjson.loads(entry) if entry else None
+
+def store_cached_script(pdf_digest: str, script: list[dict[str, str]]):
+    """Records the generated script for this PDF digest."""
+    if not redis_client:
+        return
+    try:
+        redis_client.set(script_cache_key(pdf_digest), orjson.dumps(script), ex=SCRIPT_CACHE_TTL)
+    except redis.exceptions.RedisError as e:
+        print(f"Failed to store script cache entry: {e}")
+
+def wait_for_job_result(job_id: str, timeout_s: float) -> dict | None:
+    """Blocks until the job completes or fails and returns its final status, or None on timeout."""
+    deadline = time.monotonic() + timeout_s
+    statuses = iter_job_statuses(job_id)
+    try:
+        for status_info in statuses:
+            if status_info and status_info.get("status") in ("COMPLETED", "FAILED"):
+                return status_info
+            if time.monotonic() > deadline:
+                return None
+    finally:
+        statuses.close()
+    return None
+
+def submit_segment(job_id: str, index: int, total_segments: int, segment: dict) -> str | None:
+    """Submits a single script segment to Runpod and returns its TTS job ID, or None if skipped."""
+    text = segment.get("text")
+    speaker_code = segment.get("speaker")
+    speaker_filename = speaker_filename_for(speaker_code)
+
+    if not text or not speaker_filename:
+        print(f"[Job {job_id}] Warning: Skipping segment {index+1} due to missing text or unknown speaker code '{speaker_code}'.")
+        return None
+
+    print(f"[Job {job_id}] Submitting segment {index+1}/{total_segments} (Speaker: {speaker_code} -> {speaker_filename})..." )
+    webhook_url = f"{PUBLIC_BASE_URL}/runpod-webhook/{_webhook_token}" if PUBLIC_BASE_URL else None
+    return submit_tts_job(text=text, speaker_filename=speaker_filename, webhook_url=webhook_url)
+
+def wait_for_webhook(tts_job_id: str) -> dict | None:
+    """Blocks until Runpod's webhook payload for the job arrives, or returns None after WEBHOOK_WAIT_S."""
+    if redis_client:
+        try:
+            item = redis_client.blpop(f"{WEBHOOK_RESULT_PREFIX}{tts_job_id}", timeout=WEBHOOK_WAIT_S)
+        except redis.exceptions.RedisError as e:
+            print(f"Redis Error - Failed to wait for webhook of TTS job {tts_job_id}: {e}")
+            return None
+        return orjson.loads(item[1]) if item else None
+
+    with _webhook_lock:
+        event = _webhook_events.setdefault(tts_job_id, threading.Event())
+    event.wait(WEBHOOK_WAIT_S)
+    with _webhook_lock:
+        _webhook_events.pop(tts_job_id, None)
+        entry = _webhook_payloads.pop(tts_job_id, None)
+    return entry[1] if entry else None
+
+def wait_for_tts_output(tts_job_id: str) -> dict | None:
+    """Returns the finished job JSON from its webhook callback if one was requested, otherwise (or on timeout) by polling Runpod."""
+    if PUBLIC_BASE_URL:
+        payload = wait_for_webhook(tts_job_id)
+        if payload is not None:
+            return payload
+        print(f"No webhook received for TTS job {tts_job_id} after {WEBHOOK_WAIT_S}s. Falling back to polling.")
+    return poll_tts_job(tts_job_id)
+
+def wait_for_tts_result(tts_job_id: str) -> bytes | None:
+    """Waits for a single-segment TTS job and returns its audio."""
+    result = wait_for_tts_output(tts_job_id)
+    return decode_tts_output(tts_job_id, result) if result else None
+
+def deliver_webhook(payload: dict):
+    """Stores a Runpod webhook payload where wait_for_webhook picks it up, even if the waiter has not started yet."""
+    tts_job_id = payload.get("id")
+    if redis_client:
+        result_key = f"{WEBHOOK_RESULT_PREFIX}{tts_job_id}"
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.rpush(result_key, orjson.dumps(payload))
+        pipe.expire(result_key, WEBHOOK_RESULT_TTL)
+        pipe.execute()
+        return
+    now = time.monotonic()
+    with _webhook_lock:
+        for expired_id in [job for job, (received_at, _) in _webhook_payloads.items() if now - received_at > WEBHOOK_RESULT_TTL]:
+            del _webhook_payloads[expired_id]
+            _webhook_events.pop(expired_id, None)
+        _webhook_payloads[tts_job_id] = (now, payload)
+        _webhook_events.setdefault(tts_job_id, threading.Event()).set()
+
+def synthesize_segment(job_id: str, index: int, total_segments: int, segment: dict) -> bytes | None:
+    """Synthesizes one script segment, sharing the result with identical segments already in flight."""
+    key = tts_cache_key(segment)
+    if key is None:
+        return _synthesize_segment_once(job_id, index, total_segments, segment)
+    with _inflight_tts_lock:
+        future = _inflight_tts.get(key)
+        owns_future = future is None
+        if owns_future:
+            future = _inflight_tts[key] = Future()
+    if not owns_future:
+        print(f"[Job {job_id}] Segment {index+1}/{total_segments} is already being synthesized. Waiting for that result.")
+        return future.result()
+    try:
+        audio_bytes = _synthesize_segment_once(job_id, index, total_segments, segment)
+        future.set_result(audio_bytes)
+        return audio_bytes
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_tts_lock:
+            _inflight_tts.pop(key, None)
+
+def _synthesize_segment_once(job_id: str, index: int, total_segments: int, segment: dict) -> bytes | None:
+    """Submits one script segment to Runpod and waits for its audio. Returns None if skipped or failed."""
+    text = segment.get("text")
+    speaker_filename = speaker_filename_for(segment.get("speaker"))
+    if not PUBLIC_BASE_URL and text and speaker_filename and len(text) <= RUNSYNC_MAX_CHARS:
+        print(f"[Job {job_id}] Running segment {index+1}/{total_segments} synchronously (Speaker: {segment.get('speaker')} -> {speaker_filename})...")
+        return run_tts_job_sync(text=text, speaker_filename=speaker_filename)
+    tts_job_id = submit_segment(job_id, index, total_segments, segment)
+    if not tts_job_id:
+        print(f"[Job {job_id}] Skipping result retrieval for segment {index+1} (submission failed or skipped)." )
+        return None
+    print(f"[Job {job_id}] Polling result for segment {index+1}/{total_segments} (Job ID: {tts_job_id})..." )
+    return wait_for_tts_result(tts_job_id)
+
+def synthesize_batch(job_id: str, indices: list[int], total_segments: int, script: list[dict]) -> dict[int, bytes | None]:
+    """Synthesizes the given script segments in one Runpod job. Returns their audio by index, None for any skipped or failed."""
+    if len(indices) == 1:
+        return {indices[0]: synthesize_segment(job_id, indices[0], total_segments, script[indices[0]])}
+
+    results = dict.fromkeys(indices)
+    items, item_indices = [], []
+    for i in indices:
+        text = script[i].get("text")
+        speaker_filename = speaker_filename_for(script[i].get("speaker"))
+        if not text or not speaker_filename:
+            print(f"[Job {job_id}] Warning: Skipping segment {i+1} due to missing text or unknown speaker code '{script[i].get('speaker')}'.")
+            continue
+        items.append({"text": text, "speaker_filename": speaker_filename})
+        item_indices.append(i)
+    if not items:
+        return results
+
+    print(f"[Job {job_id}] Submitting segments {item_indices[0]+1}-{item_indices[-1]+1}/{total_segments} as one batch...")
+    webhook_url = f"{PUBLIC_BASE_URL}/runpod-webhook/{_webhook_token}" if PUBLIC_BASE_URL else None
+    tts_job_id = submit_tts_batch_job(items, webhook_url=webhook_url)
+    if not tts_job_id:
+        return results
+    result = wait_for_tts_output(tts_job_id)
+    audio_list = decode_tts_batch_output(tts_job_id, result) if result else None
+    if audio_list:
+        results.update(zip(item_indices, audio_list))
+    return results
+
+# Extend or release the podcast lock only while it still holds this job's ID: if it lapsed and another
+# job took it, that job's lock must be left alone.
+_EXTEND_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end return 0"
+_RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+def _refresh_podcast_lock(lock_key: str, job_id: str, stop: threading.Event):
+    """Extends the podcast lock every third of PODCAST_LOCK_TTL until stop is set or the lock is lost."""
+    while not stop.wait(PODCAST_LOCK_TTL / 3):
+        try:
+            if not redis_client.eval(_EXTEND_LOCK_SCRIPT, 1, lock_key, job_id, PODCAST_LOCK_TTL):
+                print(f"[Job {job_id}] Podcast lock lapsed; no longer refreshing it.")
+                return
+        except redis.exceptions.RedisError as e:
+            print(f"[Job {job_id}] Redis Error - Failed to refresh podcast lock: {e}")
+
+def process_podcast_job(job_id: str, temp_pdf_path: str | bytes, original_filename: str, pdf_digest: str | None = None):
+    """The actual processing logic that runs in the background, using Redis for status.
+
+    temp_pdf_path is the saved upload, or the PDF itself for uploads kept in memory (see save_upload).
+
+    Kept synchronous on purpose: it runs on JOB_EXECUTOR, so the blocking script
+    generation and audio combining never stall the event loop.
+    """
+    global active_job_count
     print(f"[Job {job_id}] process_podcast_job function started.")
     final_audio_path = None
     status_message = "" 
     current_status = {} 
+    podcast_lock_key = f"{PODCAST_LOCK_PREFIX}{pdf_digest}" if pdf_digest and redis_client else None
+    owns_podcast_lock = False
+    stop_lock_refresh = threading.Event()
 
     try:
+        try:
+            if podcast_lock_key:
+                owns_podcast_lock = bool(redis_client.set(podcast_lock_key, job_id, nx=True, ex=PODCAST_LOCK_TTL))
+                if owns_podcast_lock:
+                    threading.Thread(target=_refresh_podcast_lock, args=(podcast_lock_key, job_id, stop_lock_refresh), daemon=True).start()
+                else:
+                    # The same PDF is already being processed; reuse its result instead of generating it twice.
+                    owner_job_id = redis_client.get(podcast_lock_key)
+                    if owner_job_id:
+                        current_status = {"status": "PROCESSING", "message": "Waiting for an identical upload to finish...", "result_path": None, "error": None}
+                        set_job_status(job_id, current_status)
+                        print(f"[Job {job_id}] Same PDF is being processed by job {owner_job_id}. Waiting for it.")
+                        # Stop waiting once the lock lapses, i.e. the owner's process died without finishing.
+                        while not wait_for_job_result(owner_job_id, PODCAST_LOCK_TTL):
+                            if redis_client.get(podcast_lock_key) != owner_job_id:
+                                break
+                    cached_path = get_cached_podcast(pdf_digest)
+                    if cached_path:
+                        current_status = {"status": "COMPLETED", "message": "Podcast generated successfully! (reused an identical upload)", "result_path": cached_path, "error": None}
+                        set_job_status(job_id, current_status)
+                        print(f"[Job {job_id}] Reused result of identical upload: {cached_path}")
+                        return
+        except redis.exceptions.RedisError as e:
+            # Deduplication is an optimization; generate the podcast without it.
+            print(f"[Job {job_id}] Redis Error - Skipping the identical-upload check: {e}")
+
         current_status = {"status": "PROCESSING", "message": "Generating script...", "result_path": None, "error": None}
         set_job_status(job_id, current_status)
-        print(f"[Job {job_id}] Calling script generator for: {temp_pdf_path}")
-        script_result = generate_podcast_script(temp_pdf_path)
-        print(f"[Job {job_id}] Script generation finished. Got {len(script_result)} segments.")
+        script_result = get_cached_script(pdf_digest) if pdf_digest else None
+        if script_result:
+            print(f"[Job {job_id}] Using cached script for this PDF ({len(script_result)} segments).")
+        else:
+            print(f"[Job {job_id}] Calling script generator for: {original_filename}")
+            script_result = generate_podcast_script(temp_pdf_path, max_seconds=SCRIPT_GENERATION_TIMEOUT_S or None, display_name=original_filename)
+            print(f"[Job {job_id}] Script generation finished. Got {len(script_result)} segments.")
+            if script_result and pdf_digest:
+                store_cached_script(pdf_digest, script_result)
 
         if not script_result:
             raise ValueError("Script generation failed or returned empty script.")
 
         total_segments = len(script_result)
 
-        current_status["message"] = f"Submitting {total_segments} TTS jobs..."
+        audio_results = [load_cached_tts(segment) for segment in script_result]
+        cached_count = sum(1 for result_bytes in audio_results if result_bytes)
+        if cached_count:
+            print(f"[Job {job_id}] Found {cached_count}/{total_segments} segments in the TTS cache.")
+
+        input_filename_stem = Path(original_filename).stem
+        # The job ID keeps concurrent jobs for same-named PDFs from writing into one file;
+        # downloads get the name without it (see download_filename).
+        output_filename = f"{input_filename_stem}_{job_id}_podcast.wav"
+        final_audio_path = os.path.join(FINAL_AUDIO_DIR, output_filename)
+
+        # Intro, then the silent lead-in, then the segments; written as soon as each prefix is ready.
+        streaming_combiner = StreamingWavCombiner(final_audio_path, total_segments, LEADING_AUDIO_PATHS)
+        for i, result_bytes in enumerate(audio_results):
+            if result_bytes:
+                streaming_combiner.add(i, result_bytes)
+
+        print(f"\n[Job {job_id}] --- Generating TTS Audio ---")
+        current_status["message"] = f"Generating audio for {total_segments - cached_count} segments..."
         set_job_status(job_id, current_status)
-        print(f"\n[Job {job_id}] --- Submitting TTS Jobs ---")
-        job_ids_tts = []
-        for i, segment in enumerate(script_result):
-            text = segment.get("text")
-            speaker_code = segment.get("speaker")
-            speaker_filename = SPEAKER_MAP.get(speaker_code)
-
-            if text and speaker_filename:
-                print(f"[Job {job_id}] Submitting segment {i+1}/{total_segments} (Speaker: {speaker_code} -> {speaker_filename})..." )
-                tts_job_id = submit_tts_job(text=text, speaker_filename=speaker_filename)
-                job_ids_tts.append(tts_job_id)
-            else:
-                print(f"[Job {job_id}] Warning: Skipping segment {i+1} due to missing text or unknown speaker code '{speaker_code}'.")
-                job_ids_tts.append(None)
-
-        print(f"\n[Job {job_id}] --- Retrieving TTS Results ---")
-        audio_results = []
-        success_count = 0
-        failure_count = 0
-        for i, tts_job_id in enumerate(job_ids_tts):
-            current_status["message"] = f"Generating audio segment {i+1}/{total_segments}..."
-            set_job_status(job_id, current_status)
-            if tts_job_id:
-                print(f"[Job {job_id}] Polling result for segment {i+1}/{total_segments} (Job ID: {tts_job_id})..." )
-                result_bytes = get_tts_job_result(tts_job_id)
-                audio_results.append(result_bytes)
-                if result_bytes:
-                    success_count += 1
-                else:
-                    failure_count += 1
-            else:
-                print(f"[Job {job_id}] Skipping result retrieval for segment {i+1} (submission failed or skipped)." )
-                audio_results.append(None)
-                failure_count += 1
+
+        # Submitting and collecting are interleaved, so finished segments are combined and reported
+        # while later ones are still waiting for a Runpod slot.
+        missing_indices = [i for i, result_bytes in enumerate(audio_results) if result_bytes is None]
+        submitted_count = len(missing_indices)
+        pending_batches = deque(missing_indices[start:start + TTS_BATCH_SIZE] for start in range(0, submitted_count, TTS_BATCH_SIZE))
+        futures = set()
+        done_count = 0
+        progress_writer = StatusWriter(job_id, current_status)
+        while pending_batches or futures:
+            # Block for a slot only when none of our own segments is in flight to collect meanwhile.
+            while pending_batches and RUNPOD_SLOTS.acquire(blocking=not futures):
+                indices = pending_batches.popleft()
+                future = TTS_EXECUTOR.submit(synthesize_batch, job_id, indices, total_segments, script_result)
+                future.add_done_callback(lambda _: RUNPOD_SLOTS.release())
+                futures.add(future)
+            done, _ = wait(futures, timeout=RUNPOD_SLOT_RECHECK_S, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.discard(future)
+                for i, result_bytes in future.result().items():
+                    audio_results[i] = result_bytes
+                    if result_bytes:
+                        store_cached_tts(script_result[i], result_bytes)
+                    combined_count = streaming_combiner.add(i, result_bytes)
+                    done_count += 1
+                progress_writer.update(message=f"Generated audio segment {done_count}/{submitted_count} ({combined_count}/{total_segments} combined)...")
+        progress_writer.flush()
+        if submitted_count:
+            try:
+                prune_tts_cache()
+            except Exception as e:
+                # Housekeeping only; the podcast itself is unaffected.
+                print(f"[Job {job_id}] Warning: TTS cache pruning failed: {e}")
+
+        success_count = sum(1 for result_bytes in audio_results if result_bytes)
+        failure_count = total_segments - success_count
 
         status_message = f"Synthesized: {success_count} segments, Failed/Skipped: {failure_count} segments."
         print(f"\n[Job {job_id}] --- TTS Processing Summary ---")
         print(status_message)
 
         if success_count == 0:
+            streaming_combiner.abort()
             raise ValueError("TTS generation failed for all segments.")
 
-        debug_dir = os.path.join(FINAL_AUDIO_DIR, f"debug_segments_{job_id}")
-        save_audio_segments(audio_results, debug_dir)
+        if SAVE_DEBUG_SEGMENTS:
+            # Written in the background so it overlaps with combining; the list is copied because it is modified below.
+            prune_debug_segments()
+            debug_dir = os.path.join(FINAL_AUDIO_DIR, f"debug_segments_{job_id}")
+            TTS_EXECUTOR.submit(save_audio_segments, list(audio_results), debug_dir)
 
-        current_status["message"] = "Combining audio segments..."
-        set_job_status(job_id, current_status)
         print(f"\n[Job {job_id}] --- Combining Audio Segments ---")
-        input_filename_stem = Path(original_filename).stem
-        output_filename = f"{input_filename_stem}_podcast.wav"
-        final_audio_path = os.path.join(FINAL_AUDIO_DIR, output_filename)
+        if streaming_combiner.finish():
+            print(f"[Job {job_id}] Segments were combined while streaming.")
+        else:
+            current_status["message"] = "Combining audio segments..."
+            set_job_status(job_id, current_status)
 
-        if os.path.exists(SILENT_AUDIO_PATH):
-            print(f"Adding silent audio from: {SILENT_AUDIO_PATH}")
-            audio_results.insert(0, open(SILENT_AUDIO_PATH, "rb").read())
+            if not combine_audio_segments(audio_results, final_audio_path, leading_audio_paths=LEADING_AUDIO_PATHS):
+                 raise ValueError(f"Audio combination failed. Segments synthesized: {success_count}")
 
-        if not combine_audio_segments(audio_results, final_audio_path, intro_audio_path=INTRO_AUDIO_PATH):
-             raise ValueError(f"Audio combination failed. Segments synthesized: {success_count}")
+        # The segment bytes are no longer needed.
+        del audio_results, script_result
        
         current_status["status"] = "COMPLETED"
         current_status["message"] = f"Podcast generated successfully! Combined {success_count} segments (intro added)."
         current_status["result_path"] = final_audio_path
         current_status["error"] = None
         set_job_status(job_id, current_status)
+        if pdf_digest:
+            store_cached_podcast(pdf_digest, final_audio_path)
         print(f"[Job {job_id}] Processing COMPLETED. Result: {final_audio_path}")
 
     except Exception as e:
@@ -312,61 +1181,228 @@ def process_podcast_job(job_id: str, temp_pdf_path: str, original_filename: str)
             except: pass
 
     finally:
-        if os.path.exists(temp_pdf_path):
+        with active_job_lock:
+            active_job_count -= 1
+        stop_lock_refresh.set()
+        if owns_podcast_lock:
             try:
-                os.remove(temp_pdf_path)
+                redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, podcast_lock_key, job_id)
+            except redis.exceptions.RedisError as e:
+                print(f"[Job {job_id}] Redis Error - Failed to release podcast lock: {e}")
+        try:
+            if discard_upload(temp_pdf_path):
                 print(f"[Job {job_id}] Cleaned up temporary PDF: {temp_pdf_path}")
-            except OSError as rm_err:
-                 print(f"[Job {job_id}] Error cleaning up temp PDF {temp_pdf_path}: {rm_err}")
+        except OSError as rm_err:
+             print(f"[Job {job_id}] Error cleaning up temp PDF {temp_pdf_path}: {rm_err}")
 
 @app.get("/")
 def read_root():
     return {"message": "XTTS Backend is running!"}
 
-@app.post("/generate-podcast-async/", status_code=202)
-async def start_podcast_generation(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(..., description="The PDF file to process")
-):
-    """Accepts PDF, starts background processing, returns job ID."""
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Invalid file type. Only PDFs are accepted.")
-    if not generate_podcast_script or not submit_tts_job or not get_tts_job_result:
+def check_processing_ready():
+    """Raises if the script generator or Runpod client is not usable."""
+    if not generate_podcast_script or not submit_tts_job or not poll_tts_job:
         raise HTTPException(status_code=500, detail="Required processing modules not loaded correctly.")
     if not RUNPOD_API_KEY:
         raise HTTPException(status_code=500, detail="RUNPOD_API_KEY is not configured.")
 
-    job_id = str(uuid.uuid4())
-    print(f"Received new job request: {job_id}")
+def check_job_capacity(new_jobs: int = 1):
+    """Rejects the request with 429 if it would exceed MAX_CONCURRENT_JOBS."""
+    with active_job_lock:
+        if active_job_count + new_jobs > MAX_CONCURRENT_JOBS:
+            raise HTTPException(status_code=429, detail="Too many podcasts are being generated right now. Please try again later.")
+
+async def validate_upload(file: UploadFile):
+    """Checks type, size and PDF signature before anything is written to disk."""
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Invalid file type. Only PDFs are accepted.")
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)} MB.")
+    header = await file.read(len(PDF_MAGIC))
+    await file.seek(0)
+    if header != PDF_MAGIC:
+        raise HTTPException(status_code=400, detail="Invalid file. The upload is not a PDF document.")
+
+def _copy_upload(source, temp_file_path: str) -> tuple[int, str]:
+    """Copies the spooled upload to disk, enforcing MAX_UPLOAD_SIZE_BYTES. Returns (bytes written, SHA-256 hex digest).
+
+    The digest is computed on the same pass as the copy, so the upload is read only once.
+    """
+    bytes_written = 0
+    digest = hashlib.sha256()
+    with open(temp_file_path, "wb") as buffer:
+        while chunk := source.read(UPLOAD_CHUNK_SIZE):
+            bytes_written += len(chunk)
+            if bytes_written > MAX_UPLOAD_SIZE_BYTES:
+                raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_UPLOAD_SIZE_BYTES // (1024 * 1024)} MB.")
+            digest.update(chunk)
+            buffer.write(chunk)
+    return bytes_written, digest.hexdigest()
+
+async def save_upload(job_id: str, file: UploadFile) -> tuple[str | bytes, str]:
+    """Keeps an uploaded PDF for its job and returns it with its SHA-256 digest.
+
+    PDFs small enough to be sent to Gemini inline are returned as bytes and never written to disk; larger ones,
+    and every upload when jobs go through the Redis job queue, are streamed to TEMP_UPLOAD_DIR and returned as the path.
+    """
+    if not USE_JOB_QUEUE and file.size is not None and file.size <= INLINE_PDF_MAX_BYTES:
+        try:
+            await file.seek(0)
+            pdf_bytes = await file.read()
+        finally:
+            await file.close()
+        pdf_digest = (await run_in_threadpool(hashlib.sha256, pdf_bytes)).hexdigest()
+        print(f"[Job {job_id}] Kept uploaded file in memory ({len(pdf_bytes)} bytes).")
+        return pdf_bytes, pdf_digest
 
-   
     temp_filename = f"{job_id}_{Path(file.filename).name}"
     temp_file_path = os.path.join(TEMP_UPLOAD_DIR, temp_filename)
     
     try:
         print(f"[Job {job_id}] Saving uploaded file to: {temp_file_path}")
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        print(f"[Job {job_id}] File saved successfully.")
+        # One threadpool hop for the whole copy, instead of one per chunk for each read and write.
+        await file.seek(0)
+        bytes_written, pdf_digest = await run_in_threadpool(_copy_upload, file.file, temp_file_path)
+        print(f"[Job {job_id}] File saved successfully ({bytes_written} bytes).")
+    except HTTPException:
+        print(f"[Job {job_id}] Upload rejected: exceeds {MAX_UPLOAD_SIZE_BYTES} bytes.")
+        discard_upload(temp_file_path)
+        raise
     except Exception as e:
         print(f"[Job {job_id}] Failed to save temporary file: {e}")
         raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
     finally:
         await file.close()
 
+    return temp_file_path, pdf_digest
+
+def discard_upload(pdf_source: str | bytes) -> bool:
+    """Removes a saved upload; uploads kept in memory need nothing. Returns True if a file was removed."""
+    if isinstance(pdf_source, bytes):
+        return False
+    try:
+        os.remove(pdf_source)
+        return True
+    except FileNotFoundError:
+        return False
+
+def enqueue_podcast_job(job_id: str, temp_file_path: str | bytes, original_filename: str, pdf_digest: str):
+    """Marks the job as pending and hands it to the job executor (or the Redis job queue), or completes it at once if this PDF was already processed."""
+    global active_job_count
+    prune_stale_uploads()
+    cached_path = get_cached_podcast(pdf_digest)
+    if cached_path:
+        set_job_status(job_id, {"status": "COMPLETED", "message": "Podcast generated successfully! (served from cache)", "result_path": cached_path, "error": None})
+        discard_upload(temp_file_path)
+        print(f"[Job {job_id}] Served from podcast cache: {cached_path}")
+        return
+
     initial_status = {"status": "PENDING", "message": "Job accepted, waiting to start...", "result_path": None, "error": None}
+    if USE_JOB_QUEUE:
+        set_job_status(job_id, initial_status)
+        try:
+            redis_client.rpush(PODCAST_QUEUE_KEY, orjson.dumps({
+                "job_id": job_id, "temp_pdf_path": temp_file_path,
+                "original_filename": original_filename, "pdf_digest": pdf_digest
+            }))
+        except redis.exceptions.RedisError as e:
+            print(f"[Job {job_id}] Redis Error - Failed to push to the job queue: {e}")
+            set_job_status(job_id, {"status": "FAILED", "message": "Could not queue the job.", "result_path": None, "error": str(e)})
+            discard_upload(temp_file_path)
+            raise HTTPException(status_code=503, detail="Job queue unavailable. Please try again later.")
+        print(f"[Job {job_id}] Task pushed to Redis job queue.")
+        return
+
+    with active_job_lock:
+        active_job_count += 1
+
     set_job_status(job_id, initial_status)
 
-    background_tasks.add_task(process_podcast_job, job_id, temp_file_path, file.filename)
-    print(f"[Job {job_id}] Task added to background queue.")
+    JOB_EXECUTOR.submit(process_podcast_job, job_id, temp_file_path, original_filename, pdf_digest)
+    print(f"[Job {job_id}] Task added to job queue.")
+
+@app.post("/generate-podcast-async/", status_code=202)
+async def start_podcast_generation(
+    file: UploadFile = File(..., description="The PDF file to process")
+):
+    """Accepts PDF, starts background processing, returns job ID."""
+    check_job_capacity()
+    await validate_upload(file)
+    check_processing_ready()
+
+    job_id = str(uuid.uuid4())
+    print(f"Received new job request: {job_id}")
+
+    temp_file_path, pdf_digest = await save_upload(job_id, file)
+    # Off the event loop: enqueueing sweeps old uploads and talks to Redis.
+    await run_in_threadpool(enqueue_podcast_job, job_id, temp_file_path, file.filename, pdf_digest)
 
     return {"message": "Podcast generation started.", "job_id": job_id}
 
+@app.post("/generate-podcast-batch/", status_code=202)
+async def start_podcast_batch_generation(
+    files: list[UploadFile] = File(..., description="The PDF files to process")
+):
+    """Accepts several PDFs at once, starts one background job per file, returns their job IDs.
+
+    All jobs share the process-wide TTS executor, so their Runpod requests are pooled together.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files. Maximum is {MAX_BATCH_FILES} per batch.")
+    check_job_capacity(len(files))
+    for file in files:
+        await validate_upload(file)
+    check_processing_ready()
+
+    saved_uploads = []
+    try:
+        for file in files:
+            job_id = str(uuid.uuid4())
+            print(f"Received new batch job request: {job_id} ({file.filename})")
+            temp_file_path, pdf_digest = await save_upload(job_id, file)
+            saved_uploads.append((job_id, temp_file_path, file.filename, pdf_digest))
+    except HTTPException:
+        for _, temp_file_path, _, _ in saved_uploads:
+            discard_upload(temp_file_path)
+        raise
+
+    for index, (job_id, temp_file_path, original_filename, pdf_digest) in enumerate(saved_uploads):
+        try:
+            await run_in_threadpool(enqueue_podcast_job, job_id, temp_file_path, original_filename, pdf_digest)
+        except HTTPException:
+            # enqueue_podcast_job already removed the failed upload; the ones after it never get queued.
+            for _, remaining_path, _, _ in saved_uploads[index + 1:]:
+                discard_upload(remaining_path)
+            raise
+
+    return {"message": f"Podcast generation started for {len(saved_uploads)} files.", "job_ids": [job_id for job_id, _, _, _ in saved_uploads]}
+
+@app.post("/runpod-webhook/{token}")
+async def runpod_webhook(token: str, request: Request):
+    """Receives finished TTS jobs from Runpod and wakes the thread waiting for them, in whichever worker it runs."""
+    if not secrets.compare_digest(token, _webhook_token):
+        raise HTTPException(status_code=404, detail="Not found.")
+    # Parsed with orjson: the payload carries the Base64 audio.
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Webhook body must be a JSON object.")
+
+    try:
+        # Off the event loop: storing the payload is a blocking Redis round trip carrying the whole clip.
+        await run_in_threadpool(deliver_webhook, payload)
+    except redis.exceptions.RedisError as e:
+        print(f"Redis Error - Failed to store webhook for TTS job {payload.get('id')}: {e}")
+        raise HTTPException(status_code=503, detail="Could not store webhook.")
+    return {"message": "Received."}
+
 @app.get("/job-status/{job_id}")
 def get_job_status(job_id: str):
     """Returns the current status of a background job from Redis."""
-    if not redis_client:
-        raise HTTPException(status_code=503, detail="Job status store (Redis) is unavailable.")
+    if not job_store_available():
+        raise HTTPException(status_code=503, detail="Job status store is unavailable.")
     
     status_info = get_job_status_from_redis(job_id)
     
@@ -375,11 +1411,31 @@ def get_job_status(job_id: str):
         raise HTTPException(status_code=404, detail="Job ID not found or status expired.")
     return status_info
 
+def stream_job_events(job_id: str):
+    """Yields the job's status as server-sent events until it completes or fails."""
+    for status_info in iter_job_statuses(job_id):
+        yield ": keepalive\n\n" if status_info is None else f"data: {orjson.dumps(status_info).decode()}\n\n"
+
+@app.get("/job-events/{job_id}")
+def get_job_events(job_id: str):
+    """Pushes status updates for a job as server-sent events, instead of polling /job-status."""
+    if not redis_client:
+        raise HTTPException(status_code=503, detail="Live job events require Redis.")
+    if not get_job_status_from_redis(job_id):
+        raise HTTPException(status_code=404, detail="Job ID not found or status expired.")
+    return StreamingResponse(stream_job_events(job_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def download_filename(result_path: str) -> str:
+    """Returns the name a finished podcast is downloaded as: its file name without the job ID."""
+    name = Path(result_path).name
+    parts = name.rsplit("_", 2)
+    return f"{parts[0]}_podcast.wav" if len(parts) == 3 and parts[2] == "podcast.wav" else name
+
 @app.get("/download-result/{job_id}")
 def download_result(job_id: str):
     """Downloads the final audio file if the job is complete, checking Redis status."""
-    if not redis_client:
-        raise HTTPException(status_code=503, detail="Job status store (Redis) is unavailable.")
+    if not job_store_available():
+        raise HTTPException(status_code=503, detail="Job status store is unavailable.")
 
     status_info = get_job_status_from_redis(job_id)
     
@@ -388,10 +1444,26 @@ def download_result(job_id: str):
 
     if status_info["status"] == "COMPLETED" and status_info.get("result_path"):
         result_path = status_info["result_path"]
-        if os.path.exists(result_path):
-            return FileResponse(path=result_path, filename=Path(result_path).name, media_type='audio/wav')
-        else:
+        try:
+            stat_result = os.stat(result_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Result file not found on server.")
+        if INTERNAL_AUDIO_PREFIX:
+            return Response(
+                media_type='audio/wav',
+                headers={
+                    "X-Accel-Redirect": f"{INTERNAL_AUDIO_PREFIX.rstrip('/')}/{urllib.parse.quote(Path(result_path).name)}",
+                    "Content-Disposition": f"attachment; filename*=utf-8''{urllib.parse.quote(download_filename(result_path))}"
+                }
+            )
+        # Reuse our stat so FileResponse skips its own; ranges let players seek and clients resume.
+        return FileResponse(
+            path=result_path,
+            stat_result=stat_result,
+            filename=download_filename(result_path),
+            media_type='audio/wav',
+            headers={"Accept-Ranges": "bytes"}
+        )
     elif status_info["status"] == "FAILED":
         raise HTTPException(status_code=400, detail=f"Job failed: {status_info.get('error', 'Unknown error')}")
     else:
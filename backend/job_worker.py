@@ -0,0 +1,76 @@
+# job_worker.py - Runs podcast jobs that app_main pushed onto the Redis job queue (JOB_QUEUE=redis).
+#
+# Start one or more next to the API, from the same directory so the saved uploads are found:
+#   REDIS_URL=... python job_worker.py
+#
+# Jobs are moved (BLMOVE, Redis 6.2+) onto this worker's own processing list while they run, and put back on
+# the queue when the worker starts again, so a worker that dies mid-job does not lose it. JOB_WORKER_ID
+# (default: the hostname) names that list and must stay the same across restarts and differ between workers.
+
+import orjson
+import os
+import socket
+import threading
+import time
+import redis
+
+import app_main
+
+PROCESSING_KEY = f"{app_main.PODCAST_QUEUE_KEY}:processing:{os.environ.get('JOB_WORKER_ID') or socket.gethostname()}"
+
+
+def requeue_unfinished_jobs():
+    """Puts jobs left on this worker's processing list by a previous run back at the front of the queue."""
+    requeued = 0
+    while app_main.redis_client.lmove(PROCESSING_KEY, app_main.PODCAST_QUEUE_KEY, "RIGHT", "LEFT") is not None:
+        requeued += 1
+    if requeued:
+        print(f"Job worker: requeued {requeued} job(s) left unfinished by a previous run.")
+
+
+def finish_queued_job(raw_job: str):
+    """Drops a job from this worker's processing list."""
+    try:
+        app_main.redis_client.lrem(PROCESSING_KEY, 1, raw_job)
+    except redis.exceptions.RedisError as e:
+        print(f"Job worker: failed to remove a finished job from '{PROCESSING_KEY}': {e}")
+
+
+def run_queued_job(job: dict, raw_job: str, job_slots: threading.BoundedSemaphore):
+    """Runs one queued job, then drops it from the processing list and frees its slot."""
+    try:
+        app_main.process_podcast_job(job["job_id"], job["temp_pdf_path"], job["original_filename"], job.get("pdf_digest"))
+    finally:
+        finish_queued_job(raw_job)
+        job_slots.release()
+
+
+def main():
+    if app_main.redis_client is None:
+        raise SystemExit("job_worker.py needs REDIS_URL to reach the job queue.")
+    # Take a job off the queue only when one can start right away, so other worker processes get the rest.
+    job_slots = threading.BoundedSemaphore(app_main.MAX_CONCURRENT_JOBS)
+    requeue_unfinished_jobs()
+    print(f"Job worker started: up to {app_main.MAX_CONCURRENT_JOBS} concurrent jobs from '{app_main.PODCAST_QUEUE_KEY}'.")
+    while True:
+        job_slots.acquire()
+        raw_job = None
+        try:
+            raw_job = app_main.redis_client.blmove(app_main.PODCAST_QUEUE_KEY, PROCESSING_KEY, 0, "LEFT", "RIGHT")
+            job = orjson.loads(raw_job)
+        except (redis.exceptions.RedisError, orjson.JSONDecodeError, TypeError) as e:
+            print(f"Job worker: failed to take a job from the queue: {e}")
+            if raw_job is not None:
+                finish_queued_job(raw_job)
+            job_slots.release()
+            time.sleep(1)
+            continue
+        print(f"[Job {job['job_id']}] Taken from the job queue.")
+        # process_podcast_job decrements this when the job ends.
+        with app_main.active_job_lock:
+            app_main.active_job_count += 1
+        app_main.JOB_EXECUTOR.submit(run_queued_job, job, raw_job, job_slots)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,41 @@
 # src/audio_combiner.py
 
 import os
+import wave
 from pydub import AudioSegment
 
+_COPY_FRAMES = 65536
+
+
+def _wav_params(path: str) -> tuple[int, int, int] | None:
+    """Returns (nchannels, sampwidth, framerate) if the file is a PCM WAV the wave module can read."""
+    if not path.lower().endswith(".wav"):
+        return None
+    try:
+        with wave.open(path, "rb") as reader:
+            return reader.getnchannels(), reader.getsampwidth(), reader.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+def _converted_frames(path: str, params: tuple[int, int, int] | None) -> AudioSegment:
+    """Decodes a segment with pydub, converted to params when given. Only used for segments that can't be copied as-is."""
+    segment = AudioSegment.from_file(path)
+    if params is None:
+        return segment
+    nchannels, sampwidth, framerate = params
+    return segment.set_frame_rate(framerate).set_channels(nchannels).set_sample_width(sampwidth)
+
+
 def combine_audio_segments(segment_paths: list[str], output_path: str):
     """
-    Combines multiple WAV audio segments into a single WAV file.
+    Combines multiple audio segments (normally WAV) into a single WAV file.
+
+    Segments in the first segment's format are copied frame-for-frame into the output
+    without decoding; only segments in another format are converted (through pydub).
 
     Args:
-        segment_paths: A list of paths to the WAV audio segments, in the order
+        segment_paths: A list of paths to the audio segments, in the order
                        they should be combined.
         output_path: The path to save the final combined WAV file.
     """
@@ -17,37 +44,57 @@ def combine_audio_segments(segment_paths: list[str], output_path: str):
         return
 
     print(f"Combining {len(segment_paths)} audio segments into {output_path}...")
-    
-    combined_audio = None
-
-    for i, path in enumerate(segment_paths):
-        if not os.path.exists(path):
-            print(f"Warning: Segment file not found, skipping: {path}")
-            continue
-        try:
-            print(f"  Loading segment {i+1}/{len(segment_paths)}: {os.path.basename(path)}")
-            segment = AudioSegment.from_wav(path)
-            
-            if combined_audio is None:
-                combined_audio = segment
-            else:
-                combined_audio += segment
-        except FileNotFoundError:
-             print(f"Warning: Segment file not found (redundant check), skipping: {path}")
-             continue
-        except Exception as e:
-            print(f"Warning: Error processing segment {path}: {e}. Skipping this segment.")
-            continue 
-
-    if combined_audio is None:
-        print("Error: No valid audio segments were loaded. Cannot save output.")
-        return
+
+    writer = None
+    params = None
 
     try:
+        for i, path in enumerate(segment_paths):
+            if not os.path.exists(path):
+                print(f"Warning: Segment file not found, skipping: {path}")
+                continue
+            try:
+                print(f"  Loading segment {i+1}/{len(segment_paths)}: {os.path.basename(path)}")
+                segment_params = _wav_params(path)
+                converted = None
+                if segment_params is None or (params is not None and segment_params != params):
+                    converted = _converted_frames(path, params)
+                    segment_params = (converted.channels, converted.sample_width, converted.frame_rate)
+            except FileNotFoundError:
+                 print(f"Warning: Segment file not found (redundant check), skipping: {path}")
+                 continue
+            except Exception as e:
+                print(f"Warning: Error processing segment {path}: {e}. Skipping this segment.")
+                continue
+
+            # Outside the per-segment handler: failing to create or write the output is fatal, not a bad segment.
+            if writer is None:
+                params = segment_params
+                if os.path.dirname(output_path):
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                writer = wave.open(output_path, "wb")
+                writer.setnchannels(params[0])
+                writer.setsampwidth(params[1])
+                writer.setframerate(params[2])
+
+            if converted is not None:
+                writer.writeframesraw(converted.raw_data)
+            else:
+                with wave.open(path, "rb") as reader:
+                    while frames := reader.readframes(_COPY_FRAMES):
+                        writer.writeframesraw(frames)
+
+        if writer is None:
+            print("Error: No valid audio segments were loaded. Cannot save output.")
+            return
+
         print(f"Exporting combined audio to: {output_path}")
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        combined_audio.export(output_path, format="wav")
+        writer.close()
+        writer = None
         print("Combined audio saved successfully.")
     except Exception as e:
         print(f"Error exporting combined audio to {output_path}: {e}")
         raise
+    finally:
+        if writer is not None:
+            writer.close()
@@ -50,7 +50,7 @@ def main():
 
     print("\nInitializing TTS Engine...")
     try:
-        tts_engine = TTSEngine(model_path=TTS_MODEL_PATH)
+        tts_engine = TTSEngine(model_path=TTS_MODEL_PATH, reference_dir=os.path.dirname(SPEAKER_A_REF_PATH))
         if not tts_engine.model:
             print("Error: TTSEngine initialization failed. Exiting.")
             sys.exit(1)
@@ -77,11 +77,9 @@ def main():
 
         print(f"  Synthesizing: '{text[:60]}...' -> {chunk_output_path}")
         try:
-            tts_engine.synthesize_segment(
-                text=text, 
-                speaker_wav=speaker_ref, 
-                output_path=chunk_output_path
-            )
+            wav_bytes = tts_engine.synthesize(text=text, speaker_filename=os.path.basename(speaker_ref))
+            with open(chunk_output_path, 'wb') as f:
+                f.write(wav_bytes)
             intro_segment_paths.append(chunk_output_path)
         except Exception as e:
             print(f"    Error synthesizing intro segment {i+1}: {e}")
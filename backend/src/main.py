@@ -3,7 +3,7 @@
 import sys
 import os
 import argparse
-import json
+import orjson
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
@@ -49,8 +49,8 @@ def main(args):
 
     print(f"\nSaving generated script to: {script_output_path}")
     try:
-        with open(script_output_path, 'w', encoding='utf-8') as f:
-            json.dump(structured_script, f, indent=4, ensure_ascii=False)
+        with open(script_output_path, 'wb') as f:
+            f.write(orjson.dumps(structured_script, option=orjson.OPT_INDENT_2))
         print("Script saved successfully.")
     except IOError as e: print(f"Error saving script to {script_output_path}: {e}"); sys.exit(1)
 
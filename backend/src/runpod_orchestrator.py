@@ -1,8 +1,12 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+import random
 import os
-import base64
-import json
+import binascii
+import pybase64
+import orjson
 
 
 RUNPOD_API_KEY = os.environ.get("RUNPOD_API_KEY")
@@ -12,20 +16,43 @@ RUNPOD_ENDPOINT_ID = os.environ.get("RUNPOD_ENDPOINT_ID", DEFAULT_RUNPOD_ENDPOIN
 
 TTS_RUN_URL = f"https://api.runpod.ai/v2/{RUNPOD_ENDPOINT_ID}/run"
 TTS_STATUS_URL = f"https://api.runpod.ai/v2/{RUNPOD_ENDPOINT_ID}/status"
+TTS_RUNSYNC_URL = f"https://api.runpod.ai/v2/{RUNPOD_ENDPOINT_ID}/runsync"
 HEADERS = {
     "Content-Type": "application/json"
 }
-POLL_INTERVAL_S = 3  
+# Polls start quickly for short segments and back off exponentially for long ones. Each sleep is
+# jittered so the many segments submitted together don't poll in lockstep.
+POLL_INITIAL_INTERVAL_S = 0.3
+POLL_MAX_INTERVAL_S = 3
+# Failed polls back off separately, up to this, so an outage isn't hammered.
+POLL_ERROR_MAX_INTERVAL_S = 30
 JOB_TIMEOUT_S = 300 
+# Should be at least the caller's number of concurrent TTS requests.
+HTTP_POOL_SIZE = int(os.environ.get("RUNPOD_HTTP_POOL_SIZE", "32"))
 
+# (connect, read) timeouts, so a stalled connection can't hold a TTS thread forever.
+HTTP_TIMEOUT_S = (5, 30)
+# /runsync holds the request open until the job finishes, or until Runpod's own wait limit (~90 s)
+# when it answers with the job's current status instead.
+RUNSYNC_TIMEOUT_S = (5, 100)
 
-def _get_auth_header():
-    """Returns the auth header if API key is available."""
-    if not RUNPOD_API_KEY:
-        raise ValueError("RUNPOD_API_KEY environment variable not set.")
-    return {"Authorization": f"Bearer {RUNPOD_API_KEY}"}
+# Transient Runpod/bucket errors are retried inside the adapter. urllib3 does not retry POST by default,
+# so a /run submission is never sent twice.
+HTTP_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+
+# One keep-alive connection pool shared by every submit and poll, so TLS is negotiated once per connection.
+_session = requests.Session()
+_session.headers.update(HEADERS)
+if RUNPOD_API_KEY:
+    _session.headers["Authorization"] = f"Bearer {RUNPOD_API_KEY}"
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRY))
+# Fetches audio the worker returned as a presigned bucket URL. Kept apart so the Runpod API key is
+# never sent to the bucket host and bucket requests don't evict the Runpod connection pool.
+_download_session = requests.Session()
+_download_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRY))
 
-def submit_tts_job(text: str, speaker_filename: str, language: str = "en") -> str | None:
+
+def submit_tts_job(text: str, speaker_filename: str, language: str = "en", webhook_url: str | None = None) -> str | None:
     """
     Submits a TTS job to the Runpod endpoint asynchronously.
 
@@ -33,14 +60,13 @@ def submit_tts_job(text: str, speaker_filename: str, language: str = "en") -> st
         text: The text to synthesize.
         speaker_filename: The filename of the speaker reference WAV (e.g., 'philip.wav').
         language: The language code (default 'en').
+        webhook_url: Optional URL Runpod POSTs the finished job to, instead of waiting to be polled.
 
     Returns:
         The job ID if submission is successful, otherwise None.
     """
-    try:
-        auth_header = _get_auth_header()
-    except ValueError as e:
-        print(f"Error: {e}")
+    if not RUNPOD_API_KEY:
+        print("Error: RUNPOD_API_KEY environment variable not set.")
         return None
 
     payload = {
@@ -50,12 +76,12 @@ def submit_tts_job(text: str, speaker_filename: str, language: str = "en") -> st
             "language": language
         }
     }
-    submit_headers = {**HEADERS, **auth_header} 
-
+    if webhook_url:
+        payload["webhook"] = webhook_url
     try:
-        response = requests.post(TTS_RUN_URL, headers=submit_headers, json=payload)
+        response = _session.post(TTS_RUN_URL, json=payload, timeout=HTTP_TIMEOUT_S)
         response.raise_for_status() 
-        result = response.json()
+        result = orjson.loads(response.content)
         job_id = result.get("id")
         if job_id:
             print(f"Submitted TTS job ({speaker_filename}): {job_id}")
@@ -69,11 +95,170 @@ def submit_tts_job(text: str, speaker_filename: str, language: str = "en") -> st
              error_message += f" - Status: {e.response.status_code}, Response: {e.response.text}"
         print(error_message)
         return None
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"Error decoding Runpod submission response: {response.text if 'response' in locals() else 'N/A'}")
         return None
 
 
+def submit_tts_batch_job(items: list[dict[str, str]], language: str = "en", webhook_url: str | None = None) -> str | None:
+    """
+    Submits several TTS items as one Runpod job, so they share a single queue wait.
+
+    Args:
+        items: The lines to synthesize, each {'text': ..., 'speaker_filename': ...}.
+        language: The language code (default 'en').
+        webhook_url: Optional URL Runpod POSTs the finished job to, instead of waiting to be polled.
+
+    Returns:
+        The job ID if submission is successful, otherwise None.
+    """
+    if not RUNPOD_API_KEY:
+        print("Error: RUNPOD_API_KEY environment variable not set.")
+        return None
+
+    payload = {"input": {"items": items, "language": language}}
+    if webhook_url:
+        payload["webhook"] = webhook_url
+    try:
+        response = _session.post(TTS_RUN_URL, json=payload, timeout=HTTP_TIMEOUT_S)
+        response.raise_for_status()
+        job_id = orjson.loads(response.content).get("id")
+        if job_id:
+            print(f"Submitted TTS batch job ({len(items)} items): {job_id}")
+        else:
+            print(f"Error: Runpod submission response missing job ID. Response: {response.text}")
+        return job_id
+    except requests.exceptions.RequestException as e:
+        error_message = f"Error submitting batch job to Runpod: {e}"
+        if e.response is not None:
+             error_message += f" - Status: {e.response.status_code}, Response: {e.response.text}"
+        print(error_message)
+        return None
+    except orjson.JSONDecodeError:
+        print(f"Error decoding Runpod submission response: {response.text}")
+        return None
+
+
+def run_tts_job_sync(text: str, speaker_filename: str, language: str = "en") -> bytes | None:
+    """
+    Runs a TTS job through Runpod's /runsync endpoint, so a short job costs one request and no polling.
+
+    If Runpod stops waiting before the job is done, the job is polled with get_tts_job_result.
+
+    Args:
+        text: The text to synthesize.
+        speaker_filename: The filename of the speaker reference WAV (e.g., 'philip.wav').
+        language: The language code (default 'en').
+
+    Returns:
+        The decoded audio bytes if the job completes successfully, otherwise None.
+    """
+    if not RUNPOD_API_KEY:
+        print("Error: RUNPOD_API_KEY environment variable not set.")
+        return None
+
+    payload = {
+        "input": {
+            "text": text,
+            "speaker_filename": speaker_filename,
+            "language": language
+        }
+    }
+    try:
+        response = _session.post(TTS_RUNSYNC_URL, json=payload, timeout=RUNSYNC_TIMEOUT_S)
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+    except requests.exceptions.RequestException as e:
+        error_message = f"Error running job on Runpod: {e}"
+        if e.response is not None:
+             error_message += f" - Status: {e.response.status_code}, Response: {e.response.text}"
+        print(error_message)
+        return None
+    except orjson.JSONDecodeError:
+        print(f"Error decoding Runpod runsync response: {response.text}")
+        return None
+
+    job_id = result.get("id")
+    if result.get("status") in ["COMPLETED", "FAILED"]:
+        return decode_tts_output(job_id, result)
+    if not job_id:
+        print(f"Error: Runpod runsync response missing job ID. Response: {result}")
+        return None
+    print(f"Job {job_id} still {result.get('status')} after runsync. Polling for the result...")
+    return get_tts_job_result(job_id)
+
+
+def decode_tts_output(job_id: str, result: dict) -> bytes | None:
+    """
+    Extracts the audio from a finished Runpod job, as returned by the status endpoint or a webhook.
+
+    The worker returns either base64 audio or, when it uploads to a bucket, a URL to download it from.
+
+    Args:
+        job_id: The ID of the job, for logging.
+        result: The job JSON containing 'status' and 'output'.
+
+    Returns:
+        The decoded audio bytes if the job completed with audio, otherwise None.
+    """
+    if result.get("status") != "COMPLETED":
+        print(f"Error: Job {job_id} failed. Status response: {result}")
+        return None
+
+    print(f"Job {job_id} completed.")
+    return _decode_audio_output(job_id, result.get("output") or {})
+
+
+def decode_tts_batch_output(job_id: str, result: dict) -> list[bytes | None] | None:
+    """
+    Extracts the audio of every item from a finished batch job (see submit_tts_batch_job).
+
+    Args:
+        job_id: The ID of the job, for logging.
+        result: The job JSON containing 'status' and 'output'.
+
+    Returns:
+        The decoded audio per item, in submission order (None for items that failed), or None if the job failed.
+    """
+    if result.get("status") != "COMPLETED":
+        print(f"Error: Job {job_id} failed. Status response: {result}")
+        return None
+
+    outputs = (result.get("output") or {}).get("outputs")
+    if not isinstance(outputs, list):
+        print(f"Error: Job {job_id} completed but no batch outputs found. Response: {result}")
+        return None
+    print(f"Job {job_id} completed ({len(outputs)} items).")
+    return [_decode_audio_output(job_id, output or {}) for output in outputs]
+
+
+def _decode_audio_output(job_id: str, output: dict) -> bytes | None:
+    """Returns the audio of one worker output, downloading it if the worker returned a URL."""
+    if output.get("audio_url"):
+        # Raw WAV bytes from the bucket: a third less to transfer than base64 and nothing to decode.
+        try:
+            response = _download_session.get(output["audio_url"], timeout=HTTP_TIMEOUT_S)
+            response.raise_for_status()
+            return response.content
+        except requests.exceptions.RequestException as e:
+            print(f"Error downloading audio for job {job_id}: {e}")
+            return None
+    base64_audio = output.get("audio_base64")
+    if not base64_audio:
+        print(f"Error: Job {job_id} completed but no audio_base64 found in output: {output}")
+        return None
+    if len(base64_audio) % 4:
+        # Truncated output; fail before decoding megabytes of it.
+        print(f"Error: Job {job_id} returned Base64 audio of invalid length {len(base64_audio)}.")
+        return None
+    try:
+        # pybase64 decodes with SIMD, several times faster than the base64 module on long clips.
+        return pybase64.b64decode(base64_audio, validate=False)
+    except (binascii.Error, ValueError) as decode_err:
+        print(f"Error decoding Base64 audio for job {job_id}: {decode_err}")
+        return None
+
+
 def get_tts_job_result(job_id: str) -> bytes | None:
     """
     Polls the Runpod status endpoint for a given job ID until completion or timeout.
@@ -84,57 +269,65 @@ def get_tts_job_result(job_id: str) -> bytes | None:
     Returns:
         The decoded audio bytes if the job completes successfully, otherwise None.
     """
+    result = poll_tts_job(job_id)
+    return decode_tts_output(job_id, result) if result else None
+
+
+def poll_tts_job(job_id: str) -> dict | None:
+    """
+    Polls the Runpod status endpoint for a given job ID until it completes or fails, or times out.
+
+    Args:
+        job_id: The ID of the job to poll.
+
+    Returns:
+        The finished job JSON (status COMPLETED or FAILED), or None on timeout.
+    """
     if not job_id:
         return None
 
-    try:
-        auth_header = _get_auth_header()
-    except ValueError as e:
-        print(f"Error: {e}")
+    if not RUNPOD_API_KEY:
+        print("Error: RUNPOD_API_KEY environment variable not set.")
         return None
 
     start_time = time.time()
     status_url = f"{TTS_STATUS_URL}/{job_id}"
-    status_headers = {**HEADERS, **auth_header} 
+    poll_interval = POLL_INITIAL_INTERVAL_S
+    error_interval = POLL_MAX_INTERVAL_S
+    last_status = None
 
     while time.time() - start_time < JOB_TIMEOUT_S:
         try:
-            response = requests.get(status_url, headers=status_headers)
+            response = _session.get(status_url, timeout=HTTP_TIMEOUT_S)
             response.raise_for_status() 
-            result = response.json()
+            result = orjson.loads(response.content)
             status = result.get("status")
+            error_interval = POLL_MAX_INTERVAL_S
+            if status == "IN_PROGRESS" and last_status != "IN_PROGRESS":
+                # Picked up by a worker: the result is now close, so poll quickly again.
+                poll_interval = POLL_INITIAL_INTERVAL_S
+            last_status = status
 
-            if status == "COMPLETED":
-                print(f"Job {job_id} completed.")
-                base64_audio = result.get("output", {}).get("audio_base64")
-                if base64_audio:
-                    try:
-                        return base64.b64decode(base64_audio)
-                    except (base64.binascii.Error, ValueError) as decode_err:
-                        print(f"Error decoding Base64 audio for job {job_id}: {decode_err}")
-                        return None
-                else:
-                    print(f"Error: Job {job_id} completed but no audio_base64 found in output. Response: {result}")
-                    return None
-            elif status == "FAILED":
-                print(f"Error: Job {job_id} failed. Status response: {result}")
-                return None
+            if status in ["COMPLETED", "FAILED"]:
+                return result
             elif status in ["IN_QUEUE", "IN_PROGRESS"]:
                 print(f"Job {job_id} status: {status}. Waiting ({int(time.time() - start_time)}s elapsed)...")
-                time.sleep(POLL_INTERVAL_S)
             else:
                  print(f"Job {job_id} encountered unexpected status: '{status}'. Waiting...")
-                 time.sleep(POLL_INTERVAL_S)
+            time.sleep(random.uniform(poll_interval / 2, poll_interval))
+            poll_interval = min(poll_interval * 2, POLL_MAX_INTERVAL_S)
 
         except requests.exceptions.RequestException as e:
             error_message = f"Error polling job {job_id}: {e}"
             if e.response is not None:
                  error_message += f" - Status: {e.response.status_code}, Response: {e.response.text}"
             print(error_message)
-            time.sleep(POLL_INTERVAL_S * 2)
-        except json.JSONDecodeError:
+            time.sleep(random.uniform(0, error_interval))
+            error_interval = min(error_interval * 2, POLL_ERROR_MAX_INTERVAL_S)
+        except orjson.JSONDecodeError:
              print(f"Error decoding Runpod status response for {job_id}: {response.text if 'response' in locals() else 'N/A'}")
-             time.sleep(POLL_INTERVAL_S * 2)
+             time.sleep(random.uniform(0, error_interval))
+             error_interval = min(error_interval * 2, POLL_ERROR_MAX_INTERVAL_S)
 
     print(f"Error: Job {job_id} timed out after {JOB_TIMEOUT_S}s.")
     return None 
\ No newline at end of file
@@ -13,43 +13,16 @@ if not API_KEY:
 genai.configure(api_key=API_KEY)
 
 MODEL_NAME = "gemini-2.0-flash"
+# Part of the script cache key in app_main; bump it whenever the prompt or the parsing below changes.
+PROMPT_VERSION = "3"
+# One script line: the speaker letter and what they say.
+SPEAKER_LINE_RE = re.compile(r"Speaker ([AB]):\s*(.*)")
 
-
-def generate_podcast_script(pdf_path: str) -> list[dict[str, str]]:
-    """
-    Generates a two-speaker podcast script from an input PDF file using the Gemini API.
-
-    Args:
-        pdf_path: The file path to the PDF document.
-
-    Returns:
-        A list of dictionaries, where each dictionary represents a line of dialogue:
-        [{'speaker': 'A', 'text': '...'}, {'speaker': 'B', 'text': '...'}]
-        Returns an empty list if generation fails.
-    """
-    if not os.path.exists(pdf_path):
-        print(f"Error: PDF file not found at {pdf_path}")
-        return []
-
-    print(f"Uploading file: {pdf_path}...")
-    try:
-        
-        pdf_file = genai.upload_file(path=pdf_path, display_name=os.path.basename(pdf_path))
-        print(f"Uploaded file '{pdf_file.display_name}' as: {pdf_file.name}")
-
-    
-
-    except Exception as e:
-        print(f"Failed to upload file {pdf_path}: {e}")
-        return []
-
-    model = genai.GenerativeModel(MODEL_NAME)
-
-    prompt = f"""
-    You are a podcast script writer. Attached is a PDF document (file name: {pdf_file.display_name}). Your task is to read this document and convert its content into a conversational podcast script between two distinct speakers: "Speaker A" and "Speaker B".
+PROMPT_INSTRUCTIONS = """
+    You are a podcast script writer. Attached is a PDF document. Your task is to read this document and convert its content into a conversational podcast script between two distinct speakers: "Speaker A" and "Speaker B".
 
     Instructions:
-    1.  Analyze the content of the provided PDF document ({pdf_file.name}).
+    1.  Analyze the content of the provided PDF document.
     2.  Create a natural-sounding conversation where Speaker A and Speaker B discuss the main points and key information from the document.
     3.  **Generally alternate** between Speaker A and Speaker B, but feel free to allow a speaker to have **two consecutive turns occasionally** if it improves the conversational flow (e.g., asking and immediately answering a rhetorical question, or elaborating on a point). Ensure a reasonable balance overall.
     4.  Keep the tone informative yet engaging, suitable for a podcast format. You can be funny and engaging, sometimes using mild colloquialisms or even a word like "shit" if it genuinely fits the context and tone, but use such language sparingly and appropriately.
@@ -60,7 +33,7 @@ def generate_podcast_script(pdf_path: str) -> list[dict[str, str]]:
 
     Example Output Format:
     Speaker A: Welcome to our podcast episode today!
-    Speaker B: Thanks! Today we're diving into the document titled '{pdf_file.display_name}'.
+    Speaker B: Thanks! Today we're diving into the document titled '...'.
     Speaker A: Indeed. The first key point seems to be...
     Speaker B: Right, and that connects to...
     Speaker B: ...which is quite interesting when you consider the implications.
@@ -69,21 +42,71 @@ def generate_podcast_script(pdf_path: str) -> list[dict[str, str]]:
     Please generate the podcast script based *only* on the attached PDF document.
     """
 
+# PDFs passed as bytes are sent inline with the request instead of through the Files API; the
+# request limit is 20 MB after base64 encoding.
+INLINE_PDF_MAX_BYTES = 14 * 1024 * 1024
+
+
+def generate_podcast_script(pdf_path: str | bytes, max_seconds: float | None = None, display_name: str | None = None) -> list[dict[str, str]]:
+    """
+    Generates a two-speaker podcast script from an input PDF file using the Gemini API.
+
+    Args:
+        pdf_path: The file path to the PDF document, or the PDF's bytes (at most INLINE_PDF_MAX_BYTES),
+                  which are sent inline so nothing is read from disk or uploaded separately.
+        max_seconds: Optional timeout for the Gemini generation request, capping worst-case latency.
+        display_name: The document name given to the model; defaults to the file's name.
+
+    Returns:
+        A list of dictionaries, where each dictionary represents a line of dialogue:
+        [{'speaker': 'A', 'text': '...'}, {'speaker': 'B', 'text': '...'}]
+        Returns an empty list if generation fails.
+    """
+    if isinstance(pdf_path, bytes):
+        display_name = display_name or "document.pdf"
+        pdf_file = {"mime_type": "application/pdf", "data": pdf_path}
+        file_name = display_name
+        pdf_path = f"{display_name} (in memory)"
+    else:
+        if not os.path.exists(pdf_path):
+            print(f"Error: PDF file not found at {pdf_path}")
+            return []
+
+        print(f"Uploading file: {pdf_path}...")
+        try:
+            
+            pdf_file = genai.upload_file(path=pdf_path, display_name=display_name or os.path.basename(pdf_path))
+            print(f"Uploaded file '{pdf_file.display_name}' as: {pdf_file.name}")
+            display_name, file_name = pdf_file.display_name, pdf_file.name
+
+        except Exception as e:
+            print(f"Failed to upload file {pdf_path}: {e}")
+            return []
+
+    model = genai.GenerativeModel(MODEL_NAME)
+
+    # The constant instructions come first and the per-document details last. At roughly 500 tokens the
+    # instructions are below Gemini's implicit-caching minimum, so this alone does not produce cache hits.
+    prompt = PROMPT_INSTRUCTIONS + f"""
+    Attached document: {display_name} ({file_name})
+    """
+
     print(f"Generating script from PDF: {pdf_path}...")
     try:
-        response = model.generate_content([prompt, pdf_file])
+        request_options = {"timeout": max_seconds} if max_seconds else None
+        response = model.generate_content([prompt, pdf_file], request_options=request_options)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            print(f"Gemini usage: {usage.prompt_token_count} prompt tokens.")
 
         
         if response.text:
             script_text = response.text.strip()
             parsed_script = []
-            lines = script_text.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line.startswith("Speaker A:"):
-                    parsed_script.append({"speaker": "A", "text": line.replace("Speaker A:", "").strip()})
-                elif line.startswith("Speaker B:"):
-                    parsed_script.append({"speaker": "B", "text": line.replace("Speaker B:", "").strip()})
+            for line in script_text.splitlines():
+                match = SPEAKER_LINE_RE.match(line.strip())
+                if match:
+                    parsed_script.append({"speaker": match.group(1), "text": match.group(2)})
             return parsed_script
         else:
             print("Error: Gemini API returned an empty response.")
@@ -1,10 +1,15 @@
 
+import hashlib
+import io
 import os
+import contextlib
+import threading
+import numpy as np
+import soundfile as sf
 import torch
 from TTS.tts.models.xtts import Xtts, XttsAudioConfig
 from TTS.tts.configs.xtts_config import XttsConfig
 from TTS.config.shared_configs import BaseDatasetConfig
-from TTS.utils.audio import AudioProcessor
 from torch.serialization import safe_globals 
 import logging
 
@@ -14,6 +19,15 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL_PATH = "../model/XTTS-v2" 
 USE_CUDA = torch.cuda.is_available()
+# Run inference under bfloat16 (or float16) autocast on GPU; set TTS_AUTOCAST=0 to compare against full
+# precision. TTS_USE_FP16 is still read when TTS_AUTOCAST is unset.
+USE_AUTOCAST = os.environ.get("TTS_AUTOCAST", os.environ.get("TTS_USE_FP16", "1")) == "1"
+# Compile the HiFi-GAN decoder with torch.compile. Off by default: compiling adds a long first
+# synthesis to every cold start, which only pays off on workers that stay warm.
+USE_TORCH_COMPILE = os.environ.get("TTS_TORCH_COMPILE") == "1"
+# Speaker conditioning latents are saved as <reference WAV>.<tag><suffix>, where the tag identifies the
+# checkpoint and conditioning settings they were computed with (see _latents_cache_tag).
+LATENTS_CACHE_SUFFIX = ".latents.pt"
 
 class TTSEngine:
     """A class to handle XTTS model loading and synthesis."""
@@ -22,16 +36,12 @@ class TTSEngine:
         logger.info("Initializing TTSEngine...")
         self.model_path = model_path
         self.reference_dir = reference_dir
+        # Speaker conditioning latents by reference filename, computed on first use.
+        self._latents_cache = {}
+        self._latents_lock = threading.Lock()
         self.config = self._load_config()
         self.model = self._load_model()
-        
-        logger.info("--- About to initialize AudioProcessor ---")
-        try:
-            self.processor = AudioProcessor.init_from_config(self.config)
-            logger.info("--- AudioProcessor initialized successfully ---")
-        except Exception as ap_e:
-             logger.error(f"FATAL: Failed during AudioProcessor initialization: {ap_e}", exc_info=True)
-             raise 
+        self._latents_tag = self._latents_cache_tag()
 
         if use_gpu and torch.cuda.is_available():
             logger.info("CUDA is available. Attempting to move model to GPU...")
@@ -57,6 +67,15 @@ class TTSEngine:
             else:
                 logger.info("Using CPU.")
             self.device = "cpu"
+
+        # bfloat16 keeps float32's exponent range, so attention scores can't overflow as in float16;
+        # fall back to float16 on GPUs without bfloat16 support.
+        self.autocast_dtype = torch.bfloat16 if self.device == "cuda" and torch.cuda.is_bf16_supported() else torch.float16
+        if USE_TORCH_COMPILE and self.device == "cuda":
+            # Only the decoder is called through forward(); the GPT runs through generate(), which
+            # torch.compile would not wrap. Input lengths vary per line, hence dynamic shapes.
+            logger.info("Compiling HiFi-GAN decoder with torch.compile...")
+            self.model.hifigan_decoder = torch.compile(self.model.hifigan_decoder, dynamic=True)
         logger.info(f"TTSEngine initialized on device: {self.device}")
 
     def _load_config(self):
@@ -106,6 +125,63 @@ class TTSEngine:
         logger.info("Model loaded successfully.")
         return model
 
+    def _autocast(self):
+        """Returns the mixed-precision context for inference: autocast to self.autocast_dtype on GPU, nothing on CPU."""
+        if self.device == "cuda" and USE_AUTOCAST:
+            return torch.autocast(device_type="cuda", dtype=self.autocast_dtype)
+        return contextlib.nullcontext()
+
+    def _latents_cache_tag(self):
+        """Identifies the checkpoint and conditioning settings, so saved latents from other ones are not reused."""
+        checkpoint = os.stat(os.path.join(self.model_path, "model.pth"))
+        settings = (
+            checkpoint.st_size, checkpoint.st_mtime_ns, self.config.gpt_cond_len, self.config.gpt_cond_chunk_len,
+            self.config.max_ref_len, self.config.sound_norm_refs
+        )
+        return hashlib.sha256(repr(settings).encode()).hexdigest()[:12]
+
+    def prepare_speaker(self, speaker_filename):
+        """Computes a speaker's conditioning latents ahead of synthesis and saves them next to the reference WAV."""
+        self._speaker_latents(speaker_filename, os.path.join(self.reference_dir, speaker_filename))
+
+    def _speaker_latents(self, speaker_filename, speaker_wav_path):
+        """Returns (gpt_cond_latent, speaker_embedding) for a reference WAV, encoding it only the first time."""
+        with self._latents_lock:
+            if speaker_filename not in self._latents_cache:
+                self._latents_cache[speaker_filename] = self._load_or_compute_latents(speaker_filename, speaker_wav_path)
+            return self._latents_cache[speaker_filename]
+
+    def _load_or_compute_latents(self, speaker_filename, speaker_wav_path):
+        """Loads the latents saved next to the reference WAV, or computes and saves them if missing or stale."""
+        # Saved next to the WAV so later processes skip decoding and encoding it; the worker image
+        # bakes them in at build time (prepare_speaker), since a container's own writes do not survive it.
+        cache_path = f"{speaker_wav_path}.{self._latents_tag}{LATENTS_CACHE_SUFFIX}"
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(speaker_wav_path):
+                latents = torch.load(cache_path, map_location=self.device)
+                logger.info(f"Loaded conditioning latents for speaker: {speaker_filename}")
+                return latents
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load cached latents from {cache_path}: {e}")
+
+        logger.info(f"Computing conditioning latents for speaker: {speaker_filename}")
+        with torch.inference_mode():
+            latents = self.model.get_conditioning_latents(
+                # The same settings model.synthesize takes from the config.
+                audio_path=[speaker_wav_path],
+                gpt_cond_len=self.config.gpt_cond_len,
+                gpt_cond_chunk_len=self.config.gpt_cond_chunk_len,
+                max_ref_length=self.config.max_ref_len,
+                sound_norm_refs=self.config.sound_norm_refs
+            )
+        try:
+            torch.save(tuple(latent.cpu() for latent in latents), cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save latents to {cache_path}: {e}")
+        return latents
+
     def synthesize(self, text, speaker_filename, language="en"):
         speaker_wav_path = os.path.join(self.reference_dir, speaker_filename)
 
@@ -116,14 +192,19 @@ class TTSEngine:
         logger.info(f"Synthesizing text: '{text[:50]}...' using speaker: {speaker_filename}")
         try:
             self.model.eval()
+            gpt_cond_latent, speaker_embedding = self._speaker_latents(speaker_filename, speaker_wav_path)
             
-            with torch.no_grad(): 
-                outputs = self.model.synthesize(
+            with torch.inference_mode(), self._autocast(): 
+                outputs = self.model.inference(
                     text=text,
-                    config=self.config,
-                    speaker_wav=[speaker_wav_path], 
                     language=language,
-                    
+                    gpt_cond_latent=gpt_cond_latent,
+                    speaker_embedding=speaker_embedding,
+                    temperature=self.config.temperature,
+                    length_penalty=self.config.length_penalty,
+                    repetition_penalty=self.config.repetition_penalty,
+                    top_k=self.config.top_k,
+                    top_p=self.config.top_p
                 )
             
             wav_data = outputs.get("wav") 
@@ -132,16 +213,17 @@ class TTSEngine:
                  raise ValueError("Synthesis failed: Model did not return 'wav' data.")
 
             logger.info("Synthesis successful.")
-            
-            
-            import io
+
             buffer = io.BytesIO()
             if isinstance(wav_data, torch.Tensor):
-                wav_data_np = wav_data.detach().cpu().numpy()
+                wav_data_np = wav_data.detach().float().cpu().numpy()
             else: 
-                 wav_data_np = wav_data
-            
-            self.processor.save_wav(wav=wav_data_np, path=buffer)
+                 # Scaled to int16 below; half-precision output would lose precision there.
+                 wav_data_np = wav_data.astype("float32", copy=False)
+
+            # Peak-normalized to int16 as AudioProcessor.save_wav did, without its extra copies.
+            pcm = (wav_data_np * (32767 / max(0.01, float(np.max(np.abs(wav_data_np)))))).astype(np.int16)
+            sf.write(buffer, pcm, self.config.audio["output_sample_rate"], format="WAV", subtype="PCM_16")
             wav_bytes = buffer.getvalue()
             return wav_bytes
 
@@ -1,17 +1,20 @@
 
-import json
+import io
 import os
 import sys
+import orjson
 import re 
+import wave
 from typing import Union 
 
 from src.tts_engine import TTSEngine 
-from src.audio_combiner import combine_audio_segments
 
 
-DEFAULT_TEMP_AUDIO_DIR = "temp_audio/"
-
 DEFAULT_TTS_MODEL_PATH = "model/XTTS-v2" 
+# XTTS's per-request character limit for English.
+MAX_CHARS_PER_TTS_CHUNK = 250
+# Whitespace after sentence-ending punctuation.
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
 
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,13 +25,15 @@ MAIN_CONTENT_OUTPUT_PATH = os.path.join(PROJECT_ROOT, "backend/output/final_podc
 
 
 def split_into_sentences(text):
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    return [s.strip() for s in sentences if s.strip()]
+    return [s for s in (x.strip() for x in SENTENCE_SPLIT_RE.split(text)) if s]
 
 def chunk_text(text, max_chars):
     """Splits text into chunks under max_chars, trying to respect sentence boundaries."""
     chunks = []
-    current_chunk = ""
+    # Sentences of the chunk being built and its length once joined; joined once when flushed
+    # instead of growing a string per sentence.
+    current_parts = []
+    current_len = 0
     sentences = split_into_sentences(text)
 
     if not sentences:
@@ -42,25 +47,25 @@ def chunk_text(text, max_chars):
             return chunks
 
     for sentence in sentences:
-        if current_chunk and len(current_chunk) + len(sentence) + 1 > max_chars: 
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence
+        if current_parts and current_len + len(sentence) + 1 > max_chars: 
+            chunks.append(" ".join(current_parts))
+            current_parts = [sentence]
+            current_len = len(sentence)
         elif len(sentence) > max_chars:
             
-             if current_chunk:
-                 chunks.append(current_chunk.strip())
-                 current_chunk = ""
+             if current_parts:
+                 chunks.append(" ".join(current_parts))
+                 current_parts = []
+                 current_len = 0
              print(f"Warning: Splitting a single sentence longer than {max_chars} chars: '{sentence[:50]}...'")
              for i in range(0, len(sentence), max_chars):
                  chunks.append(sentence[i:i+max_chars].strip())
         else:
-            if current_chunk:
-                current_chunk += " " + sentence
-            else:
-                current_chunk = sentence
+            current_len += len(sentence) + 1 if current_parts else len(sentence)
+            current_parts.append(sentence)
 
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if current_parts:
+        chunks.append(" ".join(current_parts))
 
     return [c for c in chunks if c]
 
@@ -70,8 +75,8 @@ def process_script_for_tts(script_path: str) -> Union[str, None]:
     Loads a JSON script, processes it segment by segment for TTS (handling chunking),
     using hardcoded paths for speaker references.
     Saves the combined main content audio to MAIN_CONTENT_OUTPUT_PATH.
-    Initializes TTSEngine and calls synthesize_segment.
-    Calls audio combiner function.
+    Initializes TTSEngine and calls synthesize, which encodes each speaker reference only once.
+    Appends each chunk's audio to the output as soon as it is synthesized.
 
     Args:
         script_path: Path to the generated JSON script file.
@@ -90,90 +95,79 @@ def process_script_for_tts(script_path: str) -> Union[str, None]:
     if not os.path.exists(SPEAKER_B_REF_PATH): print(f"Error: Speaker B ref not found: {SPEAKER_B_REF_PATH}"); return None
 
     try:
-        with open(script_path, 'r', encoding='utf-8') as f: structured_script = json.load(f)
+        with open(script_path, 'rb') as f: structured_script = orjson.loads(f.read())
     except FileNotFoundError: print(f"Error: Script file not found: {script_path}"); return None
-    except json.JSONDecodeError as e: print(f"Error decoding JSON script file {script_path}: {e}"); return None
+    except orjson.JSONDecodeError as e: print(f"Error decoding JSON script file {script_path}: {e}"); return None
     except Exception as e: print(f"An unexpected error occurred loading the script: {e}"); return None
 
     if not isinstance(structured_script, list): print(f"Error: Script file {script_path} invalid structure."); return None
 
-    base_output_dir = os.path.dirname(MAIN_CONTENT_OUTPUT_PATH)
-    temp_audio_dir = os.path.join(base_output_dir, os.path.basename(DEFAULT_TEMP_AUDIO_DIR))
-    os.makedirs(temp_audio_dir, exist_ok=True)
-    print(f"Temporary audio will be stored in: {temp_audio_dir}")
-
-    all_segment_paths = []
-    segment_counter = 0
-
     print("\nInitializing TTS Engine...")
     try:
-        tts_engine = TTSEngine(model_path=DEFAULT_TTS_MODEL_PATH)
+        tts_engine = TTSEngine(model_path=DEFAULT_TTS_MODEL_PATH, reference_dir=os.path.dirname(SPEAKER_A_REF_PATH))
         if not tts_engine.model: print("Error: TTSEngine init failed."); return None
     except Exception as e: print(f"Fatal error initializing TTSEngine: {e}"); return None
 
-    print("\nProcessing script segments for TTS...")
-    for i, segment in enumerate(structured_script):
-        speaker = segment.get('speaker')
-        text = segment.get('text')
-
-        if not speaker or not text:
-            print(f"Warning: Skipping segment {i+1} due to missing speaker or text.")
-            continue
-
-        print(f"\nSegment {i+1}: Speaker {speaker}")
-        speaker_ref = SPEAKER_A_REF_PATH if speaker == 'A' else SPEAKER_B_REF_PATH
-
-        text_chunks = chunk_text(text, MAX_CHARS_PER_TTS_CHUNK)
-        print(f"  Split into {len(text_chunks)} chunk(s) for TTS:")
-        for j, chunk in enumerate(text_chunks):
-            print(f"    Chunk {j+1}: '{chunk[:60]}...' ({len(chunk)} chars)")
-
-            chunk_filename = f"segment_{segment_counter:04d}_spk{speaker}_chunk{j+1}.wav"
-            chunk_output_path = os.path.join(temp_audio_dir, chunk_filename)
-
-            print(f"    Synthesizing audio for chunk {j+1}... -> {chunk_output_path}")
-            try:
-                tts_engine.synthesize_segment(
-                    text=chunk, 
-                    speaker_wav=speaker_ref, 
-                    output_path=chunk_output_path
-                )
-                all_segment_paths.append(chunk_output_path)
-            except Exception as e:
-                print(f"    Error synthesizing chunk {j+1} for segment {i+1}: {e}")
-                pass 
-            
-            segment_counter += 1
-
-    if not all_segment_paths:
-        print("\nError: No audio segments were generated successfully. Cannot combine.")
-        return None 
+    # Each chunk's frames are appended to the output as soon as it is synthesized, so combining
+    # overlaps with the rest of the synthesis instead of running as a pass over temp files after it.
+    os.makedirs(os.path.dirname(MAIN_CONTENT_OUTPUT_PATH), exist_ok=True)
+    writer = None
+    params = None
+    chunk_count = 0
 
-    print(f"\nCombining {len(all_segment_paths)} audio chunks into main content output... -> {MAIN_CONTENT_OUTPUT_PATH}")
+    print("\nProcessing script segments for TTS...")
     try:
-        combine_audio_segments(all_segment_paths, MAIN_CONTENT_OUTPUT_PATH)
+        for i, segment in enumerate(structured_script):
+            speaker = segment.get('speaker')
+            text = segment.get('text')
+
+            if not speaker or not text:
+                print(f"Warning: Skipping segment {i+1} due to missing speaker or text.")
+                continue
+
+            print(f"\nSegment {i+1}: Speaker {speaker}")
+            speaker_ref = SPEAKER_A_REF_PATH if speaker == 'A' else SPEAKER_B_REF_PATH
+
+            text_chunks = chunk_text(text, MAX_CHARS_PER_TTS_CHUNK)
+            print(f"  Split into {len(text_chunks)} chunk(s) for TTS:")
+            for j, chunk in enumerate(text_chunks):
+                print(f"    Chunk {j+1}: '{chunk[:60]}...' ({len(chunk)} chars)")
+                print(f"    Synthesizing audio for chunk {j+1}... -> {MAIN_CONTENT_OUTPUT_PATH}")
+                try:
+                    # The engine caches conditioning latents per reference file, so every chunk after
+                    # a speaker's first skips re-encoding their reference audio.
+                    wav_bytes = tts_engine.synthesize(text=chunk, speaker_filename=os.path.basename(speaker_ref))
+                    with wave.open(io.BytesIO(wav_bytes), 'rb') as reader:
+                        chunk_params = (reader.getnchannels(), reader.getsampwidth(), reader.getframerate())
+                        frames = reader.readframes(reader.getnframes())
+                except Exception as e:
+                    print(f"    Error synthesizing chunk {j+1} for segment {i+1}: {e}")
+                    continue
+
+                if writer is None:
+                    params = chunk_params
+                    writer = wave.open(MAIN_CONTENT_OUTPUT_PATH, 'wb')
+                    writer.setnchannels(params[0])
+                    writer.setsampwidth(params[1])
+                    writer.setframerate(params[2])
+                elif chunk_params != params:
+                    print(f"    Warning: Chunk {j+1} of segment {i+1} has format {chunk_params}, expected {params}. Skipping it.")
+                    continue
+                writer.writeframesraw(frames)
+                chunk_count += 1
+
+        if writer is None:
+            print("\nError: No audio segments were generated successfully. Cannot combine.")
+            return None
+        writer.close()
+        writer = None
     except Exception as e:
-        print(f"Fatal error combining audio segments: {e}"); 
-        return None 
-
-    print(f"Attempting cleanup in: {temp_audio_dir}")
-    cleanup_count = 0
-    error_count = 0
-    for path in all_segment_paths:
-        try:
-            if os.path.exists(path):
-                os.remove(path)
-                cleanup_count += 1
-        except OSError as e:
-            print(f"  Warning: Error removing {os.path.basename(path)}: {e}")
-            error_count += 1
-    print(f"Cleanup attempted: {cleanup_count} files removed, {error_count} errors.")
-    try:
-        if os.path.exists(temp_audio_dir) and not os.listdir(temp_audio_dir):
-            os.rmdir(temp_audio_dir)
-            print(f"Removed empty temporary directory: {temp_audio_dir}")
-    except OSError as e:
-        print(f"Warning: Could not remove temporary directory {temp_audio_dir}: {e}")
+        print(f"Fatal error writing main content audio: {e}")
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"\nWrote {chunk_count} audio chunks to main content output: {MAIN_CONTENT_OUTPUT_PATH}")
 
     print("\n--- Main Content TTS Processing and Combination Finished --- ")
     return MAIN_CONTENT_OUTPUT_PATH 
@@ -5,6 +5,7 @@ import sys
 import base64
 import logging
 import runpod 
+from runpod.serverless.utils import rp_upload
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir) 
@@ -23,6 +24,12 @@ except ImportError as e:
 
 MODEL_PATH = "/app/model/XTTS-v2"
 REFERENCE_DIR = "/app/reference"
+# With an S3-compatible bucket configured (BUCKET_ENDPOINT_URL, BUCKET_ACCESS_KEY_ID, BUCKET_SECRET_ACCESS_KEY),
+# audio is uploaded there and returned as a presigned URL instead of inline base64.
+# Neither this worker nor the orchestrator (which only gets the URL) deletes the uploaded clips. The bucket
+# needs a lifecycle rule that expires objects under the "tts/" prefix, e.g. after one day, or it grows forever.
+AUDIO_BUCKET_ENABLED = bool(os.environ.get("BUCKET_ENDPOINT_URL"))
+AUDIO_BUCKET_NAME = os.environ.get("BUCKET_NAME")
 
 tts_engine = None
 try:
@@ -34,48 +41,71 @@ except Exception as e:
     
     tts_engine = None # Ensure it's None if initialization failed
 
-def handler(job):
-    """ Handler function that will be called by Runpod serverless. """
-    
-    if tts_engine is None:
-        logger.error("Handler called but TTSEngine is not initialized.")
-        return {"error": "TTS Engine failed to initialize. Check worker logs."}
-
-    job_input = job.get('input', None)
-
-    if job_input is None:
-        return {"error": "Missing 'input' key in job payload"}
-
-    text = job_input.get('text')
-    speaker_filename = job_input.get('speaker_filename')
-    language = job_input.get('language', 'en')
-
-    logger.info(f"Received job: {job['id']}")
+def synthesize_item(job_id, output_name, text, speaker_filename, language):
+    """ Synthesizes one line and returns its output dict: the audio (URL or base64) or an error. """
 
     if not text or not speaker_filename:
-        logger.warning(f"Missing 'text' or 'speaker_filename' in job input: {job_input}")
+        logger.warning(f"Missing 'text' or 'speaker_filename' in job '{job_id}' input.")
         return {"error": "Missing 'text' or 'speaker_filename' in job input"}
 
     logger.info(f"Processing synthesis request: speaker='{speaker_filename}', lang='{language}', text='{text[:50]}...'")
 
     try:
         wav_bytes = tts_engine.synthesize(text, speaker_filename, language=language)
+        if AUDIO_BUCKET_ENABLED:
+            try:
+                audio_url = rp_upload.upload_in_memory_object(f"{output_name}.wav", wav_bytes, bucket_name=AUDIO_BUCKET_NAME, prefix="tts")
+                logger.info(f"Synthesis successful for job '{job_id}'. Returning audio URL.")
+                return {"audio_url": audio_url}
+            except Exception as e:
+                logger.warning(f"Bucket upload failed for job '{job_id}', returning base64 instead: {e}")
         audio_base64 = base64.b64encode(wav_bytes).decode('utf-8')
-        logger.info(f"Synthesis successful for job '{job['id']}'. Returning base64 audio.")
+        logger.info(f"Synthesis successful for job '{job_id}'. Returning base64 audio.")
         return {"audio_base64": audio_base64}
 
     except FileNotFoundError as e:
-        logger.error(f"Speaker file not found for job '{job['id']}': {e}")
+        logger.error(f"Speaker file not found for job '{job_id}': {e}")
         return {"error": f"Speaker file '{speaker_filename}' not found.", "details": str(e)}
     
     except ValueError as e:
-        logger.error(f"Value error during synthesis for job '{job['id']}': {e}")
+        logger.error(f"Value error during synthesis for job '{job_id}': {e}")
         return {"error": "Synthesis failed.", "details": str(e)}
 
     except Exception as e:
-        logger.error(f"Unexpected error during synthesis for job '{job['id']}': {e}", exc_info=True)
+        logger.error(f"Unexpected error during synthesis for job '{job_id}': {e}", exc_info=True)
         return {"error": "An unexpected error occurred during synthesis.", "details": str(e)}
 
+def handler(job):
+    """ Handler function that will be called by Runpod serverless.
+
+    The input is either a single line ('text', 'speaker_filename') or a batch ('items', a list of
+    such lines), which returns {'outputs': [...]} with one output per item, in order.
+    """
+    
+    if tts_engine is None:
+        logger.error("Handler called but TTSEngine is not initialized.")
+        return {"error": "TTS Engine failed to initialize. Check worker logs."}
+
+    job_input = job.get('input', None)
+
+    if job_input is None:
+        return {"error": "Missing 'input' key in job payload"}
+
+    language = job_input.get('language', 'en')
+
+    logger.info(f"Received job: {job['id']}")
+
+    items = job_input.get('items')
+    if items is not None:
+        if not isinstance(items, list):
+            return {"error": "'items' must be a list"}
+        return {"outputs": [
+            synthesize_item(job['id'], f"{job['id']}_{n}", item.get('text'), item.get('speaker_filename'), language)
+            for n, item in enumerate(items)
+        ]}
+
+    return synthesize_item(job['id'], job['id'], job_input.get('text'), job_input.get('speaker_filename'), language)
+
 logger.info("--- Starting Runpod serverless worker --- ")
 runpod.serverless.start({"handler": handler})
 
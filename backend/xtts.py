@@ -8,42 +8,48 @@ BASE_PATH = "model/XTTS-v2"
 REFERENCE_WAV = "wavs/phone2.wav"
 OUTPUT_PATH = "output_test/phone.wav"
 
-config = XttsConfig()
-config.load_json(os.path.join(BASE_PATH, "config.json"))
-
-config.audio = {
-    "sample_rate": 24000,
-    "output_sample_rate": 24000,
-    "frame_length_ms": 40,
-    "frame_shift_ms": 10,
-    "n_fft": 1024,
-    "num_mels": 80,
-    "mel_fmin": 0,
-    "mel_fmax": 12000
-}
-config.model_args.num_mel_positions = 608
-config.model_args.num_text_positions = 404
-
-model = Xtts.init_from_config(config)
-
-with safe_globals([XttsConfig]):
-    model.load_checkpoint(
-        config,
-        checkpoint_path=os.path.join(BASE_PATH, "model.pth"),
-        checkpoint_dir=BASE_PATH,
-        vocab_path=os.path.join(BASE_PATH, "vocab.json"),
-        use_deepspeed=False
+
+def main():
+    config = XttsConfig()
+    config.load_json(os.path.join(BASE_PATH, "config.json"))
+
+    config.audio = {
+        "sample_rate": 24000,
+        "output_sample_rate": 24000,
+        "frame_length_ms": 40,
+        "frame_shift_ms": 10,
+        "n_fft": 1024,
+        "num_mels": 80,
+        "mel_fmin": 0,
+        "mel_fmax": 12000
+    }
+    config.model_args.num_mel_positions = 608
+    config.model_args.num_text_positions = 404
+
+    model = Xtts.init_from_config(config)
+
+    with safe_globals([XttsConfig]):
+        model.load_checkpoint(
+            config,
+            checkpoint_path=os.path.join(BASE_PATH, "model.pth"),
+            checkpoint_dir=BASE_PATH,
+            vocab_path=os.path.join(BASE_PATH, "vocab.json"),
+            use_deepspeed=False
+        )
+
+
+    output = model.synthesize(
+        text="Exactly. Our document today dives into that, questioning if anarchism's inherent decentralization prevents it from effectively running larger structures.",
+        config=config,
+        speaker_wav=[REFERENCE_WAV],
+        language="en"
     )
 
+    ap = AudioProcessor.init_from_config(config)
+    ap.save_wav(output["wav"], OUTPUT_PATH)
 
-output = model.synthesize(
-    text="Exactly. Our document today dives into that, questioning if anarchism's inherent decentralization prevents it from effectively running larger structures.",
-    config=config,
-    speaker_wav=[REFERENCE_WAV],
-    language="en"
-)
+    print(f"[✅] Saved to {OUTPUT_PATH}")
 
-ap = AudioProcessor.init_from_config(config)
-ap.save_wav(output["wav"], OUTPUT_PATH)
 
-print(f"[✅] Saved to {OUTPUT_PATH}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()